@@ -0,0 +1,179 @@
+"""Priority admission control for the /api routes.
+
+Requests are sorted into route classes (emergency > detail > list, report >
+admin).
+Each class has its own concurrency limit and bounded queue on top of a shared
+total, and freed slots go to the highest-priority class that can use them.
+A request that finds its queue full, or waits past its class deadline, gets
+an immediate 503 with Retry-After instead of piling onto an overloaded
+worker, so the life-safety routes keep their latency under load.
+"""
+import asyncio
+import os
+import re
+import time
+from collections import deque
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from metrics import ADMISSION_REJECTED, ADMISSION_WAIT, registry
+
+# (method or None for any, path pattern, class or None to bypass); first match wins
+DEFAULT_RULES = [
+    (None, r"^/api/emergency$", "emergency"),
+    # Long-lived event streams would hold a slot for as long as they are open
+    (None, r"^/api/changes$", None),
+    ("POST", r"^/api/init-data$", "admin"),
+    (None, r"^/api/export$", "admin"),
+    (None, r"^/api/snakes/batch$", "detail"),
+    (None, r"^/api/snakes/[^/]+$", "detail"),
+    (None, r"^/api/identify$", "detail"),
+    # Sighting reports are cheap to acknowledge but come in floods in season
+    ("POST", r"^/api/sightings$", "report"),
+    # Carries the emergency info the app shows on start
+    (None, r"^/api/bundle$", "detail"),
+    (None, r"^/api/", "list"),
+]
+
+
+class Overloaded(Exception):
+    def __init__(self, route_class: str, reason: str, retry_after: int):
+        super().__init__(f"{route_class} budget exhausted ({reason})")
+        self.route_class = route_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class RouteClass:
+    __slots__ = ("name", "priority", "limit", "queue_size", "timeout", "retry_after")
+
+    def __init__(self, name: str, priority: int, limit: int, queue_size: int, timeout: float, retry_after: int = 1):
+        self.name = name
+        self.priority = priority
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.retry_after = retry_after
+
+    @classmethod
+    def from_env(cls, name: str, priority: int, limit: int, queue_size: int, timeout: float, retry_after: int = 1):
+        """Defaults overridable with ADMISSION_<NAME>_LIMIT, _QUEUE, _TIMEOUT and _RETRY_AFTER"""
+        prefix = f"ADMISSION_{name.upper()}_"
+        return cls(
+            name,
+            priority,
+            int(os.environ.get(prefix + "LIMIT", limit)),
+            int(os.environ.get(prefix + "QUEUE", queue_size)),
+            float(os.environ.get(prefix + "TIMEOUT", timeout)),
+            int(os.environ.get(prefix + "RETRY_AFTER", retry_after)),
+        )
+
+
+class AdmissionController:
+    def __init__(self, classes: Iterable[RouteClass], max_concurrency: int,
+                 rules: Sequence[Tuple[Optional[str], str, str]] = DEFAULT_RULES):
+        self.classes = {route_class.name: route_class for route_class in classes}
+        self.by_priority = sorted(self.classes.values(), key=lambda route_class: -route_class.priority)
+        self.max_concurrency = max_concurrency
+        self.rules = [(method, re.compile(pattern), name) for method, pattern, name in rules]
+        self.total = 0
+        self.in_flight: Dict[str, int] = {name: 0 for name in self.classes}
+        self.waiters: Dict[str, deque] = {name: deque() for name in self.classes}
+
+    def classify(self, method: str, path: str) -> Optional[str]:
+        for rule_method, pattern, name in self.rules:
+            if (rule_method is None or rule_method == method) and pattern.match(path):
+                return name
+        return None
+
+    def _can_run(self, route_class: RouteClass) -> bool:
+        return self.total < self.max_concurrency and self.in_flight[route_class.name] < route_class.limit
+
+    def _admit(self, name: str) -> None:
+        self.total += 1
+        self.in_flight[name] += 1
+
+    async def acquire(self, name: str) -> None:
+        """Wait for a slot in `name`'s budget, or raise Overloaded"""
+        route_class = self.classes[name]
+        waiters = self.waiters[name]
+        if not waiters and self._can_run(route_class):
+            self._admit(name)
+            registry.observe(ADMISSION_WAIT, (name,), 0.0)
+            return
+        if len(waiters) >= route_class.queue_size:
+            registry.inc(ADMISSION_REJECTED, (name, "queue_full"))
+            raise Overloaded(name, "queue_full", route_class.retry_after)
+
+        future = asyncio.get_running_loop().create_future()
+        waiters.append(future)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, route_class.timeout)
+        except asyncio.TimeoutError:
+            # Cancelling the future yields, so release() may already have dropped it
+            if future in waiters:
+                waiters.remove(future)
+            registry.inc(ADMISSION_REJECTED, (name, "deadline"))
+            raise Overloaded(name, "deadline", route_class.retry_after) from None
+        except BaseException:
+            # Client went away: give back a slot we were granted meanwhile
+            if future.done() and not future.cancelled():
+                self.release(name)
+            elif future in waiters:
+                waiters.remove(future)
+            raise
+        registry.observe(ADMISSION_WAIT, (name,), time.perf_counter() - start)
+
+    def release(self, name: str) -> None:
+        self.total -= 1
+        self.in_flight[name] -= 1
+        # Hand freed capacity to the most important class that can use it
+        for route_class in self.by_priority:
+            waiters = self.waiters[route_class.name]
+            while waiters and self._can_run(route_class):
+                future = waiters.popleft()
+                if future.done():
+                    continue
+                self._admit(route_class.name)
+                future.set_result(None)
+
+    def stats(self) -> Dict[Tuple[str, str], int]:
+        samples = {}
+        for name in self.classes:
+            samples[(name, "in_flight")] = self.in_flight[name]
+            samples[(name, "queued")] = len(self.waiters[name])
+        return samples
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        name = self.controller.classify(scope["method"], scope["path"])
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(name)
+        except Overloaded as e:
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", str(e.retry_after).encode()),
+                    (b"cache-control", b"no-store"),
+                ],
+            })
+            await send({"type": "http.response.body", "body": b'{"detail":"Server busy, retry shortly"}'})
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
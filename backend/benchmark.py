@@ -0,0 +1,311 @@
+"""Concurrent load and latency benchmark for the /api routes.
+
+    python benchmark.py run --sizes 10,1000,100000 --concurrency 64 --duration 30 --out bench.json
+    python benchmark.py compare before.json after.json
+
+For each catalog size the harness seeds a synthetic catalog (deterministic for
+a given --seed), starts the API with uvicorn against it, warms it up and then
+drives a weighted mix of requests from --concurrency concurrent clients.
+Results (p50/p95/p99 latency, RPS and error rate per route) are written as
+JSON so runs from different commits can be compared.
+
+Pass --mongod to start a throwaway mongod on a temporary dbpath; otherwise
+MONGO_URL is used. Either way the --db-name database (serpentaware_bench by
+default) is dropped and reseeded, and the API is started with DB_NAME set to it.
+"""
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import httpx
+import typer
+from dotenv import load_dotenv
+from pymongo import InsertOne, MongoClient
+
+from models import stable_id
+from seed_data import emergency_info, sample_snakes
+
+ROOT_DIR = Path(__file__).parent
+# MONGO_URL, as the API would read it
+load_dotenv(ROOT_DIR / '.env')
+
+app = typer.Typer(add_completion=False)
+
+DEFAULT_MIX = "list=15,card=15,filter=15,search=15,page=10,detail=20,stats=5,continents=3,emergency=2"
+
+COUNTRIES = sorted({country for snake in sample_snakes for country in snake["countries"]})
+
+
+def synthetic_catalog(size, seed):
+    rng = random.Random(seed)
+    for n in range(size):
+        template = sample_snakes[n % len(sample_snakes)]
+        scientific_name = f"{template['scientific_name']} var. {n}"
+        yield {
+            **template,
+            "id": stable_id("snake", scientific_name),
+            "name": f"{template['name']} {n}",
+            "scientific_name": scientific_name,
+            "countries": rng.sample(COUNTRIES, rng.randint(1, 5)),
+            "source": "benchmark",
+            "created_at": datetime.utcnow(),
+        }
+
+
+def seed_catalog(mongo_url, db_name, size, seed):
+    client = MongoClient(mongo_url)
+    try:
+        client.drop_database(db_name)
+        db = client[db_name]
+        batch = []
+        for doc in synthetic_catalog(size, seed):
+            batch.append(InsertOne(doc))
+            if len(batch) == 5000:
+                db.snakes.bulk_write(batch, ordered=False)
+                batch = []
+        if batch:
+            db.snakes.bulk_write(batch, ordered=False)
+        db.emergency_info.insert_many([
+            {**info, "id": stable_id("emergency", info["title"]), "source": "benchmark", "created_at": datetime.utcnow()}
+            for info in emergency_info
+        ])
+        ids = [doc["id"] for doc in db.snakes.aggregate([{"$sample": {"size": 1000}}, {"$project": {"id": 1}}])]
+    finally:
+        client.close()
+    return ids
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+@contextmanager
+def mongod_process(binary):
+    dbpath = tempfile.mkdtemp(prefix="serpentaware-bench-")
+    port = free_port()
+    process = subprocess.Popen(
+        [binary, "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        client = MongoClient(f"mongodb://127.0.0.1:{port}", serverSelectionTimeoutMS=30000)
+        client.admin.command("ping")
+        client.close()
+        yield f"mongodb://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait()
+        shutil.rmtree(dbpath, ignore_errors=True)
+
+
+@contextmanager
+def api_server(mongo_url, db_name, workers):
+    port = free_port()
+    env = {**os.environ, "MONGO_URL": mongo_url, "DB_NAME": db_name}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT_DIR, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}/api"
+    try:
+        wait_for(f"http://127.0.0.1:{port}/readyz")
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def request_factory(ids, rng):
+    words = sorted({word for snake in sample_snakes for word in snake["name"].lower().split()})
+    continents = sorted({snake["continent"] for snake in sample_snakes})
+    danger_levels = sorted({snake["danger_level"] for snake in sample_snakes})
+    return {
+        "list": lambda: ("/snakes", {}),
+        "card": lambda: ("/snakes", {"view": "card"}),
+        "filter": lambda: ("/snakes", {"continent": rng.choice(continents), "danger_level": rng.choice(danger_levels)}),
+        "search": lambda: ("/snakes", {"search": rng.choice(words), "view": "card"}),
+        "page": lambda: ("/snakes", {"continent": rng.choice(continents), "limit": 50, "view": "card"}),
+        "detail": lambda: (f"/snakes/{rng.choice(ids)}", {}),
+        "stats": lambda: ("/stats", {}),
+        "continents": lambda: ("/continents", {}),
+        "emergency": lambda: ("/emergency", {}),
+    }
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    # Nearest-rank percentile
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(latency for latency, ok in samples)
+    errors = sum(not ok for latency, ok in samples)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "rps": len(samples) / elapsed if elapsed else 0.0,
+        "mean_ms": sum(latencies) / len(latencies) if latencies else None,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else None,
+    }
+
+
+async def drive(base_url, ids, mix, concurrency, duration, seed):
+    rng = random.Random(seed)
+    factories = request_factory(ids, rng)
+    routes = list(mix)
+    weights = [mix[route] for route in routes]
+    samples = {route: [] for route in routes}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0,
+                                 headers={"Accept-Encoding": "gzip"}) as client:
+        # Warm the catalog snapshot and connection pool before measuring
+        for route in routes:
+            path, params = factories[route]()
+            await client.get(path, params=params)
+
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                route = rng.choices(routes, weights)[0]
+                path, params = factories[route]()
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path, params=params)
+                    await response.aread()
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                samples[route].append(((time.perf_counter() - start) * 1000, ok))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "routes": {route: summarize(route_samples, elapsed) for route, route_samples in samples.items()},
+        "total": summarize([sample for route_samples in samples.values() for sample in route_samples], elapsed),
+    }
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        route, _, weight = part.partition("=")
+        weights[route.strip()] = float(weight or 1)
+    unknown = set(weights) - set(request_factory(["x"], random.Random()))
+    if unknown:
+        raise typer.BadParameter(f"unknown routes: {', '.join(sorted(unknown))}", param_hint="--mix")
+    return weights
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@app.command()
+def run(
+    sizes: str = typer.Option("10,1000,100000", help="Comma-separated synthetic catalog sizes"),
+    concurrency: int = typer.Option(32, min=1),
+    duration: float = typer.Option(20.0, min=1.0, help="Seconds of measured load per size"),
+    mix: str = typer.Option(DEFAULT_MIX, help="route=weight pairs"),
+    workers: int = typer.Option(1, min=1, help="uvicorn worker processes"),
+    mongod: Optional[str] = typer.Option(None, help="Path to a mongod binary to start for the run"),
+    db_name: str = typer.Option("serpentaware_bench", help="Database to (re)seed"),
+    seed: int = typer.Option(1, help="Seed for the synthetic catalog and request mix"),
+    out: Optional[Path] = typer.Option(None, help="Write results as JSON here"),
+):
+    weights = parse_mix(mix)
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.utcnow().isoformat(),
+            "concurrency": concurrency,
+            "duration_s": duration,
+            "workers": workers,
+            "mix": weights,
+            "seed": seed,
+        },
+        "runs": [],
+    }
+
+    with (mongod_process(mongod) if mongod else nullcontext(os.environ['MONGO_URL'])) as mongo_url:
+        for size in [int(size) for size in sizes.split(",")]:
+            typer.echo(f"Seeding {size} species...")
+            ids = seed_catalog(mongo_url, db_name, size, seed)
+            with api_server(mongo_url, db_name, workers) as base_url:
+                result = asyncio.run(drive(base_url, ids, weights, concurrency, duration, seed))
+            report["runs"].append({"catalog_size": size, **result})
+            total = result["total"]
+            typer.echo(f"  {size:>7} species: {total['rps']:,.0f} rps  p50 {total['p50_ms']:.1f} ms  "
+                       f"p95 {total['p95_ms']:.1f} ms  p99 {total['p99_ms']:.1f} ms  errors {total['error_rate']:.2%}")
+
+    text = json.dumps(report, indent=2)
+    if out:
+        out.write_text(text)
+    else:
+        typer.echo(text)
+
+
+@app.command()
+def compare(before: Path, after: Path):
+    """Print per-route p50/p99/RPS changes between two result files"""
+    old = {run["catalog_size"]: run for run in json.loads(before.read_text())["runs"]}
+    new = {run["catalog_size"]: run for run in json.loads(after.read_text())["runs"]}
+
+    def change(a, b):
+        return f"{(b - a) / a:+.0%}" if a else "n/a"
+
+    for size in sorted(old.keys() & new.keys()):
+        typer.echo(f"\n{size} species")
+        typer.echo(f"{'route':<12}{'p50 ms':>16}{'p99 ms':>16}{'rps':>18}")
+        for route in ["total", *sorted(old[size]["routes"].keys() & new[size]["routes"].keys())]:
+            a = old[size]["total"] if route == "total" else old[size]["routes"][route]
+            b = new[size]["total"] if route == "total" else new[size]["routes"][route]
+            if not a["requests"] or not b["requests"]:
+                continue
+            typer.echo(f"{route:<12}"
+                       f"{b['p50_ms']:>9.1f} {change(a['p50_ms'], b['p50_ms']):>6}"
+                       f"{b['p99_ms']:>9.1f} {change(a['p99_ms'], b['p99_ms']):>6}"
+                       f"{b['rps']:>11,.0f} {change(a['rps'], b['rps']):>6}")
+
+
+if __name__ == "__main__":
+    app()
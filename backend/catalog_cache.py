@@ -0,0 +1,251 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder produces the same JSON
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def country_key(country: str) -> str:
+    """Normalize a country name for exact, case- and accent-insensitive matching"""
+    decomposed = unicodedata.normalize("NFKD", country)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+class CatalogSnapshot:
+    """An immutable view of the catalog at a given version.
+
+    `tag` identifies the snapshot content and `snake_tags` each snake's
+    content, independently of the process-local version counter, so they can
+    be used as validators across workers and restarts.
+
+    A snapshot mapped from a shared catalog file also has `bodies` and `cards`,
+    the encoded documents and card projections by id. Its `snakes` then only
+    hold the shared file's index fields; the full document of any snake in
+    `bodies` is there.
+    """
+
+    def __init__(self, version: int, snakes: List[Dict[str, Any]], emergency_info: List[Dict[str, Any]],
+                 snake_tags: Optional[Dict[str, str]] = None, bodies=None, cards=None):
+        self.version = version
+        self.snakes = snakes
+        self.emergency_info = emergency_info
+        self.by_id = {snake["id"]: snake for snake in snakes}
+        self.countries: Dict[str, str] = {}
+        self.by_country: Dict[str, List[str]] = {}
+        for snake in snakes:
+            for country in snake.get("countries", ()):
+                key = country_key(country)
+                self.countries.setdefault(key, country)
+                ids = self.by_country.setdefault(key, [])
+                if not ids or ids[-1] != snake["id"]:
+                    ids.append(snake["id"])
+        # Precomputed when the snapshot comes from a shared catalog file
+        self.snake_tags = snake_tags if snake_tags is not None else {
+            snake["id"]: content_tag(snake) for snake in snakes
+        }
+        # Optional encoded documents and cards, with get(id), `in` and excluding(ids)
+        self.bodies = bodies
+        self.cards = cards
+        self.tag = content_tag([sorted(self.snake_tags.values()), content_tag(emergency_info)])
+
+
+class CatalogCache:
+    """Read-through, versioned cache of the snake catalog.
+
+    The catalog is loaded once per version and kept in memory as JSON-ready
+    dicts. Encoded response bodies are memoised per query key in a bounded
+    LRU. Any write bumps the version, which drops the snapshot and every
+    encoded body in a single assignment.
+
+    If reloading fails, the last snapshot that loaded successfully (or one
+    restored from disk) is served instead, and the reload is retried at most
+    every `retry_after` seconds so requests don't all wait on a dead backend.
+    """
+
+    def __init__(self, max_entries: int = 256, retry_after: float = 5.0):
+        self.max_entries = max_entries
+        self.retry_after = retry_after
+        self.version = 0
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._last_good: Optional[CatalogSnapshot] = None
+        self._retry_at = 0.0
+        self._responses: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._load_lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.load_failures = 0
+        self.stale_serves = 0
+
+    def invalidate(self) -> int:
+        """Drop the snapshot and all encoded responses, returning the new version"""
+        self.version += 1
+        self._snapshot = None
+        self._responses = OrderedDict()
+        return self.version
+
+    async def snapshot(self, loader: Callable[[], Awaitable[Dict[str, Any]]]) -> CatalogSnapshot:
+        """Return the current snapshot, loading it with `loader` on first use.
+
+        `loader` returns the keyword arguments for CatalogSnapshot other than
+        the version.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self.version:
+            return snapshot
+
+        last_good = self._last_good
+        if last_good is not None and time.monotonic() < self._retry_at:
+            self.stale_serves += 1
+            return last_good
+
+        async with self._load_lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == self.version:
+                return snapshot
+
+            version = self.version
+            try:
+                snapshot = CatalogSnapshot(version, **await loader())
+            except Exception:
+                if self._last_good is None:
+                    raise
+                self.load_failures += 1
+                self.stale_serves += 1
+                self._retry_at = time.monotonic() + self.retry_after
+                logger.exception("Catalog reload failed; serving the last good snapshot")
+                return self._last_good
+            self._last_good = snapshot
+            # A write that landed while we were loading makes this snapshot stale;
+            # hand it to the caller but don't publish it.
+            if version == self.version:
+                self._snapshot = snapshot
+            return snapshot
+
+    def patch(self, upserts: Iterable[Dict[str, Any]] = (), deletes: Iterable[str] = (),
+              emergency_info: Optional[List[Dict[str, Any]]] = None) -> Optional[CatalogSnapshot]:
+        """Apply changed documents to the current snapshot instead of reloading it.
+
+        Bumps the version like invalidate(), so every encoded response goes,
+        and installs the patched snapshot. Returns it, or None if there was no
+        current snapshot to patch, in which case the next read loads one.
+        """
+        snapshot = self._snapshot
+        self.invalidate()
+        if snapshot is None:
+            return None
+        by_id = dict(snapshot.by_id)
+        snake_tags = dict(snapshot.snake_tags)
+        deletes, upserts = list(deletes), list(upserts)
+        for snake_id in deletes:
+            by_id.pop(snake_id, None)
+            snake_tags.pop(snake_id, None)
+        for snake in upserts:
+            by_id[snake["id"]] = snake
+            snake_tags[snake["id"]] = content_tag(snake)
+        # Changed snakes are held in full; the encoded copies of the rest stay valid
+        changed = deletes + [snake["id"] for snake in upserts]
+        patched = CatalogSnapshot(
+            self.version,
+            list(by_id.values()),
+            snapshot.emergency_info if emergency_info is None else emergency_info,
+            snake_tags=snake_tags,
+            bodies=snapshot.bodies.excluding(changed) if snapshot.bodies is not None else None,
+            cards=snapshot.cards.excluding(changed) if snapshot.cards is not None else None,
+        )
+        self._snapshot = self._last_good = patched
+        return patched
+
+    def restore(self, snakes: List[Dict[str, Any]], emergency_info: List[Dict[str, Any]]) -> None:
+        """Install a fallback snapshot (e.g. from disk) to serve until the first successful load.
+
+        Its version never matches the live one, so responses built from it are
+        never cached.
+        """
+        if self._last_good is None:
+            self._last_good = CatalogSnapshot(-1, snakes, emergency_info)
+
+    def get_response(self, key: Hashable) -> Optional[bytes]:
+        body = self._responses.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._responses.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put_response(self, key: Hashable, body: bytes, version: int) -> None:
+        if version != self.version:
+            return
+        responses = self._responses
+        responses[key] = body
+        responses.move_to_end(key)
+        while len(responses) > self.max_entries:
+            responses.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "version": self.version,
+            "entries": len(self._responses),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "load_failures": self.load_failures,
+            "stale_serves": self.stale_serves,
+        }
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_json(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, default=_json_default)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+def save_last_known_good(path: Path, data: Dict[str, Any]) -> None:
+    """Atomically write JSON-ready catalog data to `path`"""
+    # A temporary name of our own, so workers saving at the same time can't
+    # rename each other's half-written files into place
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(encode_json(data))
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load_last_known_good(path: Path) -> Optional[Dict[str, Any]]:
+    """Read data written by save_last_known_good; None if missing or unreadable"""
+    try:
+        return json.loads(path.read_bytes())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logger.exception("Ignoring unreadable last-known-good snapshot %s", path)
+        return None
+
+
+def content_tag(data: Any) -> str:
+    """Short, stable digest of JSON-ready data"""
+    return hashlib.sha1(encode_json(data)).hexdigest()[:20]
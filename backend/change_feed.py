@@ -0,0 +1,233 @@
+"""Follow MongoDB change streams and fan catalog changes out to clients.
+
+ChangeStreamWatcher tails a change stream over the catalog collections and
+hands each batch of events to a callback, resuming from the last token after
+errors so no change is missed. If the stream can't be resumed (the oplog
+rolled past the token, a collection was dropped) it calls `on_gap` so the
+caller can fall back to a full reload.
+
+ChangeFeed broadcasts events to Server-Sent Events subscribers. Each has a
+bounded queue; one that falls behind gets its queue replaced with a single
+`reset` event instead of holding back the others. Recent events are kept so
+a reconnecting client can resume from its Last-Event-ID.
+"""
+import asyncio
+import logging
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from catalog_cache import encode_json
+from metrics import CHANGE_STREAM_RESTARTS, registry
+
+logger = logging.getLogger(__name__)
+
+# Server error codes: change streams need a replica set; the resume point is gone
+NOT_A_REPLICA_SET = 40573
+UNRESUMABLE = {280, 286}
+
+
+def encode_event(event: str, data: Any, event_id: Optional[str] = None) -> bytes:
+    lines = [f"id: {event_id}\n".encode()] if event_id is not None else []
+    lines.append(f"event: {event}\n".encode())
+    lines.append(b"data: " + encode_json(data) + b"\n\n")
+    return b"".join(lines)
+
+
+RESET = encode_event("reset", {})
+KEEPALIVE = b": keepalive\n\n"
+
+
+class Subscription:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.messages: deque = deque()
+        self.wakeup = asyncio.Event()
+
+    def push(self, message: bytes) -> None:
+        if len(self.messages) >= self.queue_size:
+            # Too far behind to catch up event by event; refetch everything
+            self.messages.clear()
+            message = RESET
+        self.messages.append(message)
+        self.wakeup.set()
+
+    def drain(self) -> List[bytes]:
+        messages = list(self.messages)
+        self.messages.clear()
+        self.wakeup.clear()
+        return messages
+
+
+class ChangeFeed:
+    def __init__(self, history: int = 256, queue_size: int = 64, max_subscribers: int = 1000,
+                 heartbeat: float = 15.0):
+        # Event ids are only meaningful to the process that issued them
+        self.stream_id = uuid.uuid4().hex[:8]
+        self.sequence = 0
+        self.history: deque = deque(maxlen=history)
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.heartbeat = heartbeat
+        self.subscribers = set()
+        self.closed = False
+
+    def publish(self, event: str, data: Any) -> None:
+        self.sequence += 1
+        message = encode_event(event, data, f"{self.stream_id}-{self.sequence}")
+        self.history.append((self.sequence, message))
+        for subscription in self.subscribers:
+            subscription.push(message)
+
+    def _since(self, last_event_id: str) -> Optional[List[bytes]]:
+        """Events after `last_event_id`, or None if we can't tell what the client missed"""
+        stream_id, _, sequence = last_event_id.partition("-")
+        if stream_id != self.stream_id or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        oldest = self.history[0][0] if self.history else self.sequence + 1
+        if sequence + 1 < oldest:
+            return None
+        return [message for event_sequence, message in self.history if event_sequence > sequence]
+
+    @property
+    def full(self) -> bool:
+        return len(self.subscribers) >= self.max_subscribers
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Subscription:
+        subscription = Subscription(self.queue_size)
+        if last_event_id:
+            missed = self._since(last_event_id)
+            for message in [RESET] if missed is None else missed:
+                subscription.push(message)
+        self.subscribers.add(subscription)
+        return subscription
+
+    async def stream(self, last_event_id: Optional[str] = None):
+        """Subscribe and yield encoded SSE messages until the feed closes"""
+        # Subscribing here rather than up front means a response that is never
+        # started can't leave a subscription behind
+        subscription = self.subscribe(last_event_id)
+        try:
+            yield b"retry: 3000\n\n"
+            while not self.closed:
+                try:
+                    await asyncio.wait_for(subscription.wakeup.wait(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from timing out an idle connection
+                    yield KEEPALIVE
+                    continue
+                for message in subscription.drain():
+                    yield message
+        finally:
+            self.subscribers.discard(subscription)
+
+    def close(self) -> None:
+        """End every open stream, e.g. on shutdown"""
+        self.closed = True
+        for subscription in self.subscribers:
+            subscription.wakeup.set()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": len(self.subscribers),
+            "sequence": self.sequence,
+            "queued": sum(len(subscription.messages) for subscription in self.subscribers),
+        }
+
+
+class ChangeStreamWatcher:
+    def __init__(self, db, collections: Iterable[str],
+                 on_changes: Callable[[List[Dict[str, Any]]], Awaitable[None]],
+                 on_gap: Callable[[], Awaitable[None]],
+                 batch_size: int = 500, max_await_ms: int = 500, max_backoff: float = 30.0):
+        self.db = db
+        self.pipeline = [{"$match": {"ns.coll": {"$in": list(collections)}}}]
+        self.on_changes = on_changes
+        self.on_gap = on_gap
+        self.batch_size = batch_size
+        # Also how long a batch waits for more events after its first, so a
+        # burst of writes is applied once
+        self.max_await_ms = max_await_ms
+        self.max_backoff = max_backoff
+        self.resume_token = None
+        self._opened = False
+        # True while the stream is open; callers may stop polling meanwhile
+        self.active = False
+
+    def _open(self):
+        return self.db.watch(
+            self.pipeline,
+            full_document="updateLookup",
+            # Deletes only carry the _id; the pre-image has our id when the
+            # collection records them (changeStreamPreAndPostImages)
+            full_document_before_change="whenAvailable",
+            resume_after=self.resume_token,
+            max_await_time_ms=self.max_await_ms,
+        )
+
+    async def run(self) -> None:
+        """Watch until cancelled, or until the server turns out not to support change streams"""
+        backoff = 0.5
+        while True:
+            try:
+                async with self._open() as stream:
+                    if self._opened and self.resume_token is None:
+                        # Whatever happened while we weren't watching went unseen
+                        await self._gap()
+                    self._opened = True
+                    self.active = True
+                    backoff = 0.5
+                    await self._follow(stream)
+            except asyncio.CancelledError:
+                self.active = False
+                raise
+            except OperationFailure as e:
+                self.active = False
+                if e.code == NOT_A_REPLICA_SET:
+                    logger.warning("Change streams unavailable (%s); relying on polling", e)
+                    return
+                if e.code in UNRESUMABLE:
+                    registry.inc(CHANGE_STREAM_RESTARTS, ("history_lost",))
+                    logger.warning("Change stream can't resume (%s); reloading the catalog", e)
+                    self.resume_token = None
+                    continue
+                registry.inc(CHANGE_STREAM_RESTARTS, ("error",))
+                logger.error("Change stream failed, retrying in %.1fs: %s", backoff, e)
+            except PyMongoError as e:
+                self.active = False
+                registry.inc(CHANGE_STREAM_RESTARTS, ("error",))
+                logger.error("Change stream failed, retrying in %.1fs: %s", backoff, e)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def _follow(self, stream) -> None:
+        while stream.alive:
+            change = await stream.try_next()
+            if change is None:
+                continue
+            batch = [change]
+            while len(batch) < self.batch_size:
+                change = await stream.try_next()
+                if change is None:
+                    break
+                batch.append(change)
+            try:
+                await self.on_changes(batch)
+            except Exception:
+                logger.exception("Applying %d change events failed; reloading the catalog", len(batch))
+                await self._gap()
+            self.resume_token = stream.resume_token
+            if batch[-1]["operationType"] == "invalidate":
+                # The stream is closed for good; start a new one from now
+                self.resume_token = None
+                self.active = False
+                return
+
+    async def _gap(self) -> None:
+        try:
+            await self.on_gap()
+        except Exception:
+            logger.exception("Change stream gap handler failed")
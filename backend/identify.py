@@ -0,0 +1,202 @@
+"""Rank snakes against traits observed in the field.
+
+TraitMatcher turns a catalog snapshot into dense NumPy arrays once per
+catalog version:
+
+- a (snakes x terms) uint8 matrix of identification terms, 2 where the term
+  is one of the snake's identification features and 1 where it only appears
+  in the description,
+- continent codes and per-country row indices for the location prior,
+- size ranges in meters for the length prior.
+
+Scoring a query then gathers the few query-term columns and combines them
+with the location and length vectors, so ranking the whole catalog is a
+handful of vector operations.
+"""
+import math
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from catalog_cache import country_key
+from search_index import tokenize
+
+# Trait words that only say which trait is being described
+STOPWORDS = {
+    "a", "an", "and", "or", "the", "to", "of", "on", "in", "with", "behind", "down", "its",
+    "head", "heads", "pupil", "pupils", "eye", "eyes", "color", "colour", "colored", "coloured",
+    "coloration", "colouration", "pattern", "patterns", "patterned", "marking", "markings",
+    "body", "shaped", "shape", "like", "mark", "scale", "scales", "snake", "very", "quite",
+}
+
+# Spellings observers use for the same trait
+SYNONYMS = {
+    "elliptical": "vertical", "slit": "vertical", "cat": "vertical", "catlike": "vertical",
+    "rounded": "round", "circular": "round",
+    "grey": "gray", "greyish": "gray", "grayish": "gray", "brownish": "brown", "blackish": "black",
+    "greenish": "green", "yellowish": "yellow", "orangish": "orange",
+    "zig": "zigzag", "zag": "zigzag", "diamonds": "diamond", "bands": "band", "banded": "band",
+    "crossbands": "crossband", "stripes": "stripe", "striped": "stripe", "spotted": "spot", "spots": "spot",
+    "hooded": "hood", "triangle": "triangular", "v": "v_mark", "x": "x_mark",
+}
+
+TRAIT_FIELDS = ("head_shape", "pupil_shape", "color", "pattern")
+
+# How much each kind of evidence counts towards the overall match
+TRAIT_WEIGHT = 1.0
+LOCATION_WEIGHT = 1.5
+LENGTH_WEIGHT = 1.0
+# Same continent but not a listed country still leaves some chance
+CONTINENT_ONLY_SCORE = 0.3
+# Softmax temperature turning match scores into confidences
+CONFIDENCE_TEMPERATURE = 0.1
+
+FEATURE_STRENGTH = 2
+DESCRIPTION_STRENGTH = 1
+
+_METERS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*-\s*(\d+(?:\.\d+)?)\s*(?:m\b|meters?|metres?)")
+_FEET_RE = re.compile(r"(\d+(?:\.\d+)?)\s*-\s*(\d+(?:\.\d+)?)\s*(?:ft\b|feet|foot)")
+FEET = 0.3048
+
+
+def trait_terms(text: str) -> List[str]:
+    """Normalize free text into comparable trait terms"""
+    terms = []
+    for token in tokenize(text.replace("-", " ").replace("/", " ")):
+        token = SYNONYMS.get(token, token)
+        if token in STOPWORDS or token.isdigit():
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = SYNONYMS.get(token[:-1], token[:-1])
+        terms.append(token)
+    return terms
+
+
+def size_range_meters(size_range: str):
+    """Parse '3-8 feet (0.9-2.4 meters)' into (0.9, 2.4); NaNs when unknown"""
+    match = _METERS_RE.search(size_range or "")
+    if match:
+        return float(match.group(1)), float(match.group(2))
+    match = _FEET_RE.search(size_range or "")
+    if match:
+        return float(match.group(1)) * FEET, float(match.group(2)) * FEET
+    return math.nan, math.nan
+
+
+class TraitMatcher:
+    def __init__(self, snakes: Sequence[Dict[str, Any]], version: int = 0):
+        self.version = version
+        self.snakes = list(snakes)
+        n = len(self.snakes)
+
+        feature_terms = [
+            set(term for feature in snake.get("identification_features", ()) for term in trait_terms(feature))
+            for snake in self.snakes
+        ]
+        self.terms = {term: i for i, term in enumerate(sorted(set().union(*feature_terms)))}
+        # Column-major so gathering the query's columns reads contiguous memory
+        self.matrix = np.zeros((n, len(self.terms)), dtype=np.uint8, order="F")
+        for row, (snake, terms) in enumerate(zip(self.snakes, feature_terms)):
+            # Descriptions only count for terms some species lists as a feature
+            described = [self.terms[term] for term in trait_terms(snake.get("description", "")) if term in self.terms]
+            self.matrix[row, described] = DESCRIPTION_STRENGTH
+            self.matrix[row, [self.terms[term] for term in terms]] = FEATURE_STRENGTH
+        # Rare terms say more about the species than common ones
+        document_frequency = np.count_nonzero(self.matrix, axis=0)
+        self.idf = np.log1p(n / np.maximum(document_frequency, 1)).astype(np.float32)
+
+        self.continents = sorted({snake["continent"] for snake in self.snakes})
+        continent_index = {continent.casefold(): i for i, continent in enumerate(self.continents)}
+        self.continent_codes = np.array(
+            [continent_index[snake["continent"].casefold()] for snake in self.snakes], dtype=np.int16
+        )
+        self._continent_index = continent_index
+        rows_by_country: Dict[str, List[int]] = {}
+        for row, snake in enumerate(self.snakes):
+            for country in snake.get("countries", ()):
+                rows_by_country.setdefault(country_key(country), []).append(row)
+        self.country_rows = {country: np.array(rows, dtype=np.int32) for country, rows in rows_by_country.items()}
+
+        sizes = np.array([size_range_meters(snake.get("size_range", "")) for snake in self.snakes], dtype=np.float32)
+        self.min_length = sizes[:, 0] if n else np.zeros(0, dtype=np.float32)
+        self.max_length = sizes[:, 1] if n else np.zeros(0, dtype=np.float32)
+
+    def _location_scores(self, location: str):
+        """Per-snake location prior, or None if the place isn't one we know"""
+        key = country_key(location)
+        rows = self.country_rows.get(key)
+        continent = self._continent_index.get(location.strip().casefold())
+        if rows is None and continent is None:
+            return None
+        scores = np.zeros(len(self.snakes), dtype=np.float32)
+        if rows is not None:
+            # A country implies the continent(s) of the species found there
+            for code in np.unique(self.continent_codes[rows]):
+                scores[self.continent_codes == code] = CONTINENT_ONLY_SCORE
+            scores[rows] = 1.0
+        else:
+            scores[self.continent_codes == continent] = 1.0
+        return scores
+
+    def _length_scores(self, length: float):
+        below = self.min_length - length
+        above = length - self.max_length
+        distance = np.maximum(np.maximum(below, above), 0.0)
+        # Observers misjudge length; fall off relative to the species' size
+        tolerance = np.maximum(0.25 * self.max_length, 0.1)
+        scores = np.exp(-distance / tolerance)
+        return np.where(np.isnan(scores), 0.5, scores).astype(np.float32)
+
+    def rank(self, traits: Dict[str, Optional[str]], location: Optional[str] = None,
+             length: Optional[float] = None, limit: int = 5) -> Dict[str, Any]:
+        """Score every snake and return the best `limit` candidates.
+
+        Each candidate carries `score`, the weighted share of the observed
+        evidence it matches (0-1), and `confidence`, its softmax share of the
+        whole catalog.
+        """
+        query = list(dict.fromkeys(term for field in TRAIT_FIELDS for term in trait_terms(traits.get(field) or "")))
+        known = [term for term in query if term in self.terms]
+        unmatched = [term for term in query if term not in self.terms]
+
+        n = len(self.snakes)
+        total = np.zeros(n, dtype=np.float32)
+        weight = 0.0
+        if known:
+            columns = [self.terms[term] for term in known]
+            term_weights = self.idf[columns]
+            matched = self.matrix[:, columns].astype(np.float32) @ term_weights
+            total += TRAIT_WEIGHT * matched / (FEATURE_STRENGTH * term_weights.sum())
+            weight += TRAIT_WEIGHT
+        if location:
+            location_scores = self._location_scores(location)
+            if location_scores is None:
+                unmatched.append(location)
+            else:
+                total += LOCATION_WEIGHT * location_scores
+                weight += LOCATION_WEIGHT
+        if length is not None:
+            total += LENGTH_WEIGHT * self._length_scores(length)
+            weight += LENGTH_WEIGHT
+
+        if not weight or not n:
+            return {"candidates": [], "unmatched_terms": unmatched}
+        scores = total / weight
+        exp = np.exp((scores - scores.max()) / CONFIDENCE_TEMPERATURE)
+        confidence = exp / exp.sum()
+
+        limit = min(limit, n)
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.lexsort((top, -scores[top]))]
+        top = top[scores[top] > 0]
+        candidates = []
+        for row in top:
+            row = int(row)
+            candidates.append({
+                "snake": self.snakes[row],
+                "score": round(float(scores[row]), 4),
+                "confidence": round(float(confidence[row]), 4),
+                "matched_terms": [term for term in known if self.matrix[row, self.terms[term]]],
+            })
+        return {"candidates": candidates, "unmatched_terms": unmatched}
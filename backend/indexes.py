@@ -0,0 +1,132 @@
+"""Index registry and query-plan diagnostics for the catalog collections.
+
+Every index the API relies on is declared in INDEXES and created idempotently
+at startup. ROUTE_QUERIES mirrors the queries routes send to MongoDB; running
+
+    python indexes.py
+
+explains each of them against the configured database and exits non-zero if
+any of them unexpectedly falls back to a collection scan.
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+# Collections MongoDB stores as time series, bucketed by time per meta value
+TIMESERIES = {
+    "sightings": {"timeField": "observed_at", "metaField": "meta", "granularity": "hours"},
+}
+
+# Index names are left to MongoDB's defaults so redeclaring an existing index
+# is always a no-op rather than a name conflict.
+INDEXES = {
+    "snakes": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("continent", ASCENDING), ("danger_level", ASCENDING)]),
+        IndexModel([("danger_level", ASCENDING)]),
+        IndexModel([("name", ASCENDING), ("id", ASCENDING)]),
+    ],
+    "emergency_info": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("priority", ASCENDING)]),
+    ],
+    "sightings": [
+        IndexModel([("meta.species_id", ASCENDING), ("observed_at", DESCENDING)]),
+    ],
+    "sighting_rollups": [
+        IndexModel([("kind", ASCENDING), ("count", DESCENDING)]),
+    ],
+}
+
+# (route, collection, filter, sort, expect_collscan)
+ROUTE_QUERIES = [
+    ("GET /snakes/{id}", "snakes", {"id": "00000000-0000-0000-0000-000000000000"}, None, False),
+    ("GET /snakes/batch", "snakes", {"id": {"$in": ["00000000-0000-0000-0000-000000000000"]}}, None, False),
+    ("GET /snakes", "snakes", {}, [("name", 1), ("id", 1)], False),
+    ("GET /snakes?continent", "snakes", {"continent": "Asia"}, [("name", 1), ("id", 1)], False),
+    ("GET /snakes?danger_level", "snakes", {"danger_level": "Deadly"}, [("name", 1), ("id", 1)], False),
+    ("GET /snakes?continent&danger_level", "snakes", {"continent": "Asia", "danger_level": "Deadly"},
+     [("name", 1), ("id", 1)], False),
+    ("GET /export", "snakes", {}, [("id", 1)], False),
+    ("GET /export?continent", "snakes", {"continent": "Asia"}, [("id", 1)], False),
+    ("GET /emergency", "emergency_info", {}, [("priority", 1)], False),
+    ("GET /sightings/rollups", "sighting_rollups", {"kind": "species"}, [("count", -1)], False),
+    # The catalog snapshot reads the whole collection by design; search and
+    # the country routes are answered from it
+    ("catalog snapshot", "snakes", {}, None, True),
+]
+
+
+async def ensure_indexes(db):
+    """Create every declared collection and index; safe to call on every startup"""
+    existing = set(await db.list_collection_names())
+    for collection, options in TIMESERIES.items():
+        if collection in existing:
+            continue
+        try:
+            await db.create_collection(collection, timeseries=options)
+        except (CollectionInvalid, OperationFailure):
+            # Fine if another worker created it first
+            if collection not in await db.list_collection_names():
+                raise
+    for collection, indexes in INDEXES.items():
+        await db[collection].create_indexes(indexes)
+
+
+def plan_stages(plan):
+    """Yield every stage name in an explain() plan tree"""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from plan_stages(item)
+
+
+async def explain_routes(db):
+    """Explain each route query, returning one result dict per query"""
+    results = []
+    for route, collection, query, sort, expect_collscan in ROUTE_QUERIES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explanation = await cursor.explain()
+        stages = list(plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {})))
+        collscan = "COLLSCAN" in stages
+        results.append({
+            "route": route,
+            "collection": collection,
+            "stages": stages,
+            "collscan": collscan,
+            "ok": expect_collscan or not collscan,
+        })
+    return results
+
+
+async def main():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        await ensure_indexes(db)
+        results = await explain_routes(db)
+    finally:
+        client.close()
+
+    for result in results:
+        status = "ok" if result["ok"] else "COLLSCAN"
+        print(f"{status:<9} {result['route']:<38} {' > '.join(result['stages'])}")
+    return all(result["ok"] for result in results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,203 @@
+"""Bulk species ingestion from CSV or JSONL.
+
+    python ingest.py snakes.csv --source "afrherp-2024"
+
+Rows are streamed in chunks, validated against the Snake model in a process
+pool and upserted with unordered bulk writes keyed by the same stable ids the
+seed data uses. List fields in CSV files may be JSON arrays or "|"-separated.
+Progress is checkpointed after every chunk, so re-running the same command
+after a failure resumes where it stopped. Each chunk that writes anything bumps
+the catalog version, which running API workers poll to reload the catalog.
+"""
+import json
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+import typer
+from pydantic import ValidationError
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from models import CATALOG_STATS_ID, Snake, bump_catalog_version, content_hash, stable_id, stats_delta
+
+LIST_FIELDS = [name for name, field in Snake.model_fields.items() if getattr(field.annotation, "__origin__", None) is list]
+STATS_PROJECTION = {"_id": 0, "id": 1, "content_hash": 1, "continent": 1, "danger_level": 1, "is_venomous": 1}
+
+
+def clean_row(row):
+    """Drop empty cells and turn CSV list cells into lists"""
+    data = {}
+    for key, value in row.items():
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            continue
+        if key in LIST_FIELDS and isinstance(value, str):
+            value = value.strip()
+            if value.startswith("["):
+                value = json.loads(value)
+            else:
+                value = [item.strip() for item in value.split("|") if item.strip()]
+        data[key] = value
+    return data
+
+
+def validate_chunk(rows, offset, source):
+    """Validate a chunk of rows; runs in a worker process.
+
+    Returns (docs, rejects) where each doc is ready to $set and each reject
+    records the input row number and the validation error.
+    """
+    docs, rejects = [], []
+    for n, row in enumerate(rows):
+        try:
+            data = clean_row(row)
+            data.pop("id", None)
+            snake = Snake(id=stable_id("snake", data.get("scientific_name")), **data)
+        except (ValidationError, ValueError, TypeError) as e:
+            rejects.append({"row": offset + n, "error": str(e), "data": row})
+            continue
+        doc = snake.model_dump(mode="json", exclude={"created_at"})
+        # Hash the normalized document so CSV and JSONL copies of a row agree
+        docs.append({**doc, "source": source, "content_hash": content_hash(doc)})
+    return docs, rejects
+
+
+def write_chunk(collection, docs):
+    """Upsert the changed docs of a chunk; returns (written, unchanged, failed, stats inc).
+
+    Rows for the same species map to the same id; the last one wins and the
+    ones it replaces count as unchanged.
+    """
+    unique = list({doc["id"]: doc for doc in docs}.values())
+    existing = {
+        doc["id"]: doc
+        for doc in collection.find({"id": {"$in": [doc["id"] for doc in unique]}}, STATS_PROJECTION)
+    }
+    changed = [doc for doc in unique if existing.get(doc["id"], {}).get("content_hash") != doc["content_hash"]]
+    if not changed:
+        return 0, len(docs), [], {}
+
+    operations = [
+        UpdateOne({"id": doc["id"]}, {"$set": doc, "$setOnInsert": {"created_at": datetime.utcnow()}}, upsert=True)
+        for doc in changed
+    ]
+    failed = []
+    try:
+        collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        failed = [{"id": changed[error["index"]]["id"], "error": error["errmsg"]} for error in e.details["writeErrors"]]
+    failed_ids = {error["id"] for error in failed}
+    written = [doc for doc in changed if doc["id"] not in failed_ids]
+    removed = [existing[doc["id"]] for doc in written if doc["id"] in existing]
+    return len(written), len(docs) - len(changed), failed, stats_delta(written, removed)
+
+
+def read_chunks(path, fmt, chunk_size):
+    if fmt == "csv":
+        return pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False, na_values=[""])
+    return pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False)
+
+
+def load_checkpoint(checkpoint_path, path):
+    if not checkpoint_path.exists():
+        return 0
+    checkpoint = json.loads(checkpoint_path.read_text())
+    stat = path.stat()
+    if checkpoint.get("size") != stat.st_size or checkpoint.get("mtime") != stat.st_mtime:
+        typer.echo(f"{path} changed since the last run; starting from the beginning")
+        return 0
+    return checkpoint["rows_done"]
+
+
+def save_checkpoint(checkpoint_path, path, rows_done):
+    stat = path.stat()
+    tmp = checkpoint_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"size": stat.st_size, "mtime": stat.st_mtime, "rows_done": rows_done}))
+    tmp.replace(checkpoint_path)
+
+
+def main(
+    path: Path = typer.Argument(..., exists=True, dir_okay=False, help="CSV or JSONL file of species"),
+    source: str = typer.Option(..., help="Dataset name recorded on every imported document"),
+    fmt: Optional[str] = typer.Option(None, "--format", help="csv or jsonl; inferred from the file suffix"),
+    chunk_size: int = typer.Option(5000, min=1, help="Rows per chunk"),
+    workers: int = typer.Option(os.cpu_count() or 1, min=1, help="Validation processes"),
+    rejects_path: Optional[Path] = typer.Option(None, "--rejects", help="Where to write rejected rows as JSONL"),
+    resume: bool = typer.Option(True, help="Resume from the last checkpoint for this file"),
+):
+    if source == "seed":
+        raise typer.BadParameter("'seed' is reserved for /api/init-data", param_hint="--source")
+    fmt = fmt or ("csv" if path.suffix.lower() == ".csv" else "jsonl")
+    checkpoint_path = path.with_name(path.name + ".ingest-checkpoint")
+    rejects_path = rejects_path or path.with_name(path.name + ".rejects.jsonl")
+    rows_done = load_checkpoint(checkpoint_path, path) if resume else 0
+    if rows_done:
+        typer.echo(f"Resuming after row {rows_done}")
+
+    # Fork the workers before the Mongo client starts its background threads
+    pool = ProcessPoolExecutor(max_workers=workers)
+    client = MongoClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    totals = {"rows": 0, "written": 0, "unchanged": 0, "rejected": 0}
+    started = time.perf_counter()
+    pending = deque()
+
+    def drain(block_until):
+        nonlocal rows_done
+        while pending and len(pending) > block_until:
+            end, future = pending.popleft()
+            docs, rejects = future.result()
+            written, unchanged, failed, inc = write_chunk(db.snakes, docs) if docs else (0, 0, [], {})
+            rejects.extend({"row": None, "id": error["id"], "error": error["error"]} for error in failed)
+            if inc:
+                db.catalog_stats.update_one({"_id": CATALOG_STATS_ID}, {"$inc": inc, "$set": {"updated_at": datetime.utcnow()}})
+            if written:
+                # API workers reload the catalog when they see the version move
+                bump_catalog_version(db.catalog_meta)
+            if rejects:
+                with rejects_path.open("a") as f:
+                    for reject in rejects:
+                        f.write(json.dumps(reject, default=str) + "\n")
+            totals["written"] += written
+            totals["unchanged"] += unchanged
+            totals["rejected"] += len(rejects)
+            rows_done = end
+            save_checkpoint(checkpoint_path, path, rows_done)
+            elapsed = time.perf_counter() - started
+            typer.echo(f"{rows_done} rows  {totals['rows'] / elapsed:,.0f} rows/s  "
+                       f"written={totals['written']} unchanged={totals['unchanged']} rejected={totals['rejected']}")
+
+    try:
+        offset = 0
+        for chunk in read_chunks(path, fmt, chunk_size):
+            start, offset = offset, offset + len(chunk)
+            if offset <= rows_done:
+                continue
+            if start < rows_done:
+                chunk, start = chunk.iloc[rows_done - start:], rows_done
+            rows = chunk.to_dict("records")
+            totals["rows"] += len(rows)
+            pending.append((offset, pool.submit(validate_chunk, rows, start, source)))
+            drain(block_until=workers * 2)
+        drain(block_until=0)
+    finally:
+        pool.shutdown(cancel_futures=True)
+        client.close()
+
+    checkpoint_path.unlink(missing_ok=True)
+    elapsed = time.perf_counter() - started
+    typer.echo(f"Done: {totals['rows']} rows in {elapsed:.1f}s ({totals['rows'] / max(elapsed, 1e-9):,.0f} rows/s), "
+               f"{totals['written']} written, {totals['unchanged']} unchanged, {totals['rejected']} rejected")
+    if totals["rejected"]:
+        typer.echo(f"Rejected rows: {rejects_path}")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,79 @@
+"""Measure payload size and encoding/compression CPU cost per read endpoint.
+
+Builds each endpoint's payload from the seed data (no MongoDB needed) and
+compares FastAPI's default path (pydantic models -> jsonable_encoder ->
+JSONResponse) with the catalog encoder, uncompressed and with gzip/brotli.
+
+    python measure_payloads.py --scale 100
+"""
+import time
+from collections import Counter
+
+import typer
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import compression
+from catalog_cache import encode_json, orjson
+from models import EmergencyInfo, Snake, stable_id
+from seed_data import emergency_info, sample_snakes
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def build_payloads(scale):
+    snakes = []
+    for n in range(scale):
+        for data in sample_snakes:
+            data = {**data, "scientific_name": f"{data['scientific_name']} {n}"}
+            snakes.append(Snake(id=stable_id("snake", data["scientific_name"]), **data))
+    emergency = [EmergencyInfo(**info) for info in emergency_info]
+    continents = Counter(snake.continent.value for snake in snakes)
+    stats = {
+        "total_snakes": len(snakes),
+        "venomous_snakes": sum(snake.is_venomous for snake in snakes),
+        "deadly_snakes": sum(snake.danger_level == "Deadly" for snake in snakes),
+        "continents": dict(continents),
+    }
+    return {
+        "/snakes": snakes,
+        "/snakes/{id}": snakes[0],
+        "/emergency": emergency,
+        "/continents": [{"continent": c, "count": n} for c, n in sorted(continents.items())],
+        "/stats": stats,
+    }
+
+
+def main(
+    scale: int = typer.Option(1, help="Multiply the seed catalog this many times"),
+    repeat: int = typer.Option(20, help="Iterations per timing"),
+):
+    encoder = "orjson" if orjson is not None else "json"
+    typer.echo(f"catalog: {len(sample_snakes) * scale} snakes, encoder: {encoder}, "
+               f"encodings: {', '.join(compression.supported_encodings())}\n")
+    header = f"{'endpoint':<22}{'default ms':>11}{'fast ms':>9}{'raw B':>10}"
+    for encoding in compression.supported_encodings():
+        header += f"{encoding + ' B':>10}{encoding + ' ms':>9}"
+    typer.echo(header)
+
+    for endpoint, payload in build_payloads(scale).items():
+        default_body, default_ms = timed(lambda: JSONResponse(jsonable_encoder(payload)).body, repeat)
+        data = jsonable_encoder(payload)
+        fast_body, fast_ms = timed(lambda: encode_json(data), repeat)
+        row = f"{endpoint:<22}{default_ms:>11.3f}{fast_ms:>9.3f}{len(fast_body):>10}"
+        for encoding in compression.supported_encodings():
+            compressed, ms = timed(lambda: compression.compress(fast_body, encoding), repeat)
+            row += f"{len(compressed):>10}{ms:>9.3f}"
+        typer.echo(row)
+
+    typer.echo("\ndefault ms: pydantic -> jsonable_encoder -> JSONResponse; fast ms: encode_json on cached dicts.")
+    typer.echo("Cached catalog bodies pay the encode and compress cost once per catalog version.")
+
+
+if __name__ == "__main__":
+    typer.run(main)
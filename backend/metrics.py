@@ -0,0 +1,194 @@
+"""Request and MongoDB instrumentation exposed in Prometheus text format.
+
+MetricsMiddleware records per-route latency, response size and time spent in
+MongoDB; MongoCommandListener records per-command duration and documents
+returned. Recording is a bisect and a few integer additions per observation,
+so it is cheap enough to leave on in production.
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from threading import Lock
+from typing import Optional
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+COUNT_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 100000)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Histograms, counters and gauges keyed by (metric name, label values)"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        # pymongo listeners run on Motor's executor threads
+        self._lock = Lock()
+
+    def histogram(self, name, help, buckets, labels):
+        self._histograms[name] = (help, labels, buckets, {})
+        return name
+
+    def counter(self, name, help, labels):
+        self._counters[name] = (help, labels, {})
+        return name
+
+    def gauge(self, name, help, labels, collect):
+        """Register a gauge whose {label values: value} samples come from `collect()` at scrape time"""
+        self._gauges[name] = (help, labels, collect)
+        return name
+
+    def observe(self, name, labels, value):
+        _, _, buckets, series = self._histograms[name]
+        histogram = series.get(labels)
+        if histogram is None:
+            with self._lock:
+                histogram = series.setdefault(labels, Histogram(buckets))
+        histogram.observe(value)
+
+    def inc(self, name, labels, value=1):
+        series = self._counters[name][2]
+        with self._lock:
+            series[labels] = series.get(labels, 0) + value
+
+    def render(self):
+        lines = []
+        for name, (help, label_names, _, series) in self._histograms.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(series.items()):
+                base = _labels(label_names, labels)
+                prefix = base + "," if base else ""
+                cumulative = 0
+                for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{base}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{base}}} {histogram.count}")
+        for kind, metrics in (("counter", self._counters), ("gauge", self._gauges)):
+            for name, (help, label_names, samples) in metrics.items():
+                if callable(samples):
+                    samples = samples()
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(samples.items()):
+                    lines.append(f"{name}{{{_labels(label_names, labels)}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+registry = Registry()
+
+HTTP_LATENCY = registry.histogram("http_request_duration_seconds", "Request latency by route", LATENCY_BUCKETS, ("method", "route", "status"))
+HTTP_SIZE = registry.histogram("http_response_size_bytes", "Response body size by route", SIZE_BUCKETS, ("method", "route"))
+HTTP_DB_TIME = registry.histogram("http_request_mongo_seconds", "Time spent in MongoDB commands per request", LATENCY_BUCKETS, ("method", "route"))
+MONGO_LATENCY = registry.histogram("mongo_command_duration_seconds", "MongoDB command latency", LATENCY_BUCKETS, ("command", "collection"))
+MONGO_DOCS = registry.histogram("mongo_command_documents_returned", "Documents returned per MongoDB command", COUNT_BUCKETS, ("command", "collection"))
+MONGO_FAILURES = registry.counter("mongo_command_failures_total", "Failed MongoDB commands", ("command", "collection"))
+SINGLEFLIGHT_CALLS = registry.counter(
+    "singleflight_calls_total", "Coalesced calls; followers shared a leader's in-flight result", ("group", "role")
+)
+ADMISSION_WAIT = registry.histogram("admission_queue_wait_seconds", "Time spent queued for a concurrency slot", LATENCY_BUCKETS, ("class",))
+ADMISSION_REJECTED = registry.counter("admission_rejected_total", "Requests shed with 503 by admission control", ("class", "reason"))
+SINGLEFLIGHT_FAILURES = registry.counter("singleflight_failures_total", "Coalesced calls that failed or timed out", ("group", "reason"))
+CHANGE_EVENTS = registry.counter("change_stream_events_total", "MongoDB change events received", ("collection", "operation"))
+CHANGE_STREAM_RESTARTS = registry.counter("change_stream_restarts_total", "Change stream reconnects", ("reason",))
+
+# Accumulates MongoDB time for the request being served
+_request_db_time: ContextVar[Optional[list]] = ContextVar("request_db_time", default=None)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        db_time = [0.0]
+        token = _request_db_time.set(db_time)
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_db_time.reset(token)
+            route = scope.get("route")
+            route = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            registry.observe(HTTP_LATENCY, (method, route, status), time.perf_counter() - start)
+            registry.observe(HTTP_SIZE, (method, route), size)
+            registry.observe(HTTP_DB_TIME, (method, route), db_time[0])
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Per-command timing; pass to the client via event_listeners=[...]"""
+
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+        self._collections[(event.connection_id, event.request_id)] = (
+            collection if isinstance(collection, str) else "", _request_db_time.get()
+        )
+
+    def succeeded(self, event):
+        collection, db_time = self._collections.pop((event.connection_id, event.request_id), ("", None))
+        seconds = event.duration_micros / 1e6
+        labels = (event.command_name, collection)
+        registry.observe(MONGO_LATENCY, labels, seconds)
+        cursor = event.reply.get("cursor") if isinstance(event.reply, dict) else None
+        if cursor is not None:
+            batch = cursor.get("firstBatch", cursor.get("nextBatch", ()))
+            registry.observe(MONGO_DOCS, labels, len(batch))
+        if db_time is not None:
+            db_time[0] += seconds
+
+    def failed(self, event):
+        collection, db_time = self._collections.pop((event.connection_id, event.request_id), ("", None))
+        registry.inc(MONGO_FAILURES, (event.command_name, collection))
+        if db_time is not None:
+            db_time[0] += event.duration_micros / 1e6
+
+
+mongo_listener = MongoCommandListener()
@@ -0,0 +1,123 @@
+"""Catalog document models and helpers shared by the API and the command-line tools.
+
+Importing this module has no side effects (no database client, caches or
+background tasks), so ingest.py and friends can use it without loading server.py.
+"""
+import hashlib
+import json
+import uuid
+from collections import Counter
+from datetime import datetime
+from enum import Enum
+from typing import List
+
+from pydantic import BaseModel, Field
+from pymongo import ReturnDocument
+
+# Materialized statistics document in `catalog_stats`
+CATALOG_STATS_ID = "catalog"
+# Counter in `catalog_meta` that every catalog writer bumps; API workers that
+# aren't following a change stream poll it to notice writes from elsewhere
+CATALOG_VERSION_ID = "version"
+
+# Seed documents get ids derived from their natural key, so re-seeding never changes them
+SEED_NAMESPACE = uuid.UUID("6f0c5d2e-3b1a-4c8e-9a57-2d4b8e1f7c30")
+
+
+class Continent(str, Enum):
+    NORTH_AMERICA = "North America"
+    SOUTH_AMERICA = "South America"
+    EUROPE = "Europe"
+    AFRICA = "Africa"
+    ASIA = "Asia"
+    AUSTRALIA = "Australia"
+
+
+class DangerLevel(str, Enum):
+    HARMLESS = "Harmless"
+    MILDLY_VENOMOUS = "Mildly Venomous"
+    VENOMOUS = "Venomous"
+    HIGHLY_VENOMOUS = "Highly Venomous"
+    DEADLY = "Deadly"
+
+
+class Snake(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str
+    scientific_name: str
+    continent: Continent
+    countries: List[str]
+    danger_level: DangerLevel
+    is_venomous: bool
+    image_url: str
+    description: str
+    habitat: List[str]
+    size_range: str
+    identification_features: List[str]
+    behavior: str
+    diet: str
+    what_to_do: List[str]
+    what_not_to_do: List[str]
+    first_aid: List[str]
+    interesting_facts: List[str]
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class SnakeCard(BaseModel):
+    """Summary of a snake for list and grid views"""
+    id: str
+    name: str
+    scientific_name: str
+    continent: Continent
+    danger_level: DangerLevel
+    is_venomous: bool
+    image_url: str
+    description: str
+
+
+SNAKE_CARD_FIELDS = tuple(SnakeCard.model_fields)
+
+
+class EmergencyInfo(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    title: str
+    icon: str
+    priority: int
+    quick_steps: List[str]
+    emergency_numbers: List[str]
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+def stable_id(kind, key):
+    return str(uuid.uuid5(SEED_NAMESPACE, f"{kind}:{key}"))
+
+
+def content_hash(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def stats_delta(added, removed):
+    """Translate added/removed snakes into $inc updates for the stats document"""
+    inc = Counter()
+    for sign, docs in ((1, added), (-1, removed)):
+        for doc in docs:
+            inc["total_snakes"] += sign
+            if doc.get("is_venomous"):
+                inc["venomous_snakes"] += sign
+            if doc.get("danger_level") == "Deadly":
+                inc["deadly_snakes"] += sign
+            inc[f"continents.{doc['continent']}"] += sign
+    return {field: value for field, value in inc.items() if value}
+
+
+def bump_catalog_version(catalog_meta):
+    """Record a catalog write; returns the updated version document.
+
+    Works with a PyMongo or a Motor collection (for Motor, await the result).
+    """
+    return catalog_meta.find_one_and_update(
+        {"_id": CATALOG_VERSION_ID},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
@@ -0,0 +1,390 @@
+"""Read-side storage backends for the snake catalog.
+
+The API reads the catalog through a SnakeRepository and an EmergencyRepository
+so the same handlers can be served from:
+
+- MongoDB (the primary, and the only backend that accepts writes),
+- memory, from a list of documents (tests, or small edge nodes), or
+- an embedded SQLite file, built from an /api/export dump:
+
+    python repository.py serpentaware-export.ndjson catalog.sqlite
+
+Documents are JSON-ready dicts without Mongo's `_id`. Page and export order
+match the Mongo queries: (name, id) for pages, id for exports. Search is not
+a repository concern: it runs on the in-process SearchIndex over the catalog
+snapshot, whichever backend the snapshot came from.
+"""
+import asyncio
+import gzip
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from collections import Counter
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import typer
+
+from catalog_cache import encode_json
+
+# Equality filters the list routes and exports may pass
+FILTER_FIELDS = ("continent", "danger_level")
+
+
+def compute_stats(snakes: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    total = venomous = deadly = 0
+    continents: Counter = Counter()
+    for snake in snakes:
+        total += 1
+        venomous += bool(snake["is_venomous"])
+        deadly += snake["danger_level"] == "Deadly"
+        continents[snake["continent"]] += 1
+    return {
+        "total_snakes": total,
+        "venomous_snakes": venomous,
+        "deadly_snakes": deadly,
+        "continents": dict(continents),
+    }
+
+
+def _matches(doc: Dict[str, Any], filters: Optional[Dict[str, Any]]) -> bool:
+    return not filters or all(doc.get(field) == value for field, value in filters.items())
+
+
+def _project(doc: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    if fields is None:
+        return doc
+    return {field: doc[field] for field in (*fields, "id", "name") if field in doc}
+
+
+class SnakeRepository(ABC):
+    @abstractmethod
+    async def all(self) -> List[Dict[str, Any]]:
+        """Every snake, in storage order"""
+
+    @abstractmethod
+    async def get(self, snake_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def get_many(self, ids: Sequence[str]) -> List[Dict[str, Any]]:
+        """The snakes among `ids` that exist, in no particular order"""
+
+    @abstractmethod
+    async def page(
+        self,
+        limit: int,
+        after: Optional[Tuple[str, str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Up to `limit` snakes ordered by (name, id), strictly after the (name, id) key `after`.
+
+        With `fields`, documents carry those fields plus `id` and `name`.
+        """
+
+    @abstractmethod
+    async def stats(self) -> Dict[str, Any]:
+        """Totals and per-continent counts, as served by /stats"""
+
+    @abstractmethod
+    def iterate(self, filters: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream snakes ordered by id without holding them all in memory"""
+
+    async def ping(self) -> None:
+        """Raise if the backend cannot serve reads"""
+
+
+class EmergencyRepository(ABC):
+    @abstractmethod
+    async def all(self) -> List[Dict[str, Any]]:
+        """Every emergency info item, by priority"""
+
+    async def iterate(self) -> AsyncIterator[Dict[str, Any]]:
+        for info in await self.all():
+            yield info
+
+
+class MongoSnakeRepository(SnakeRepository):
+    def __init__(self, db, batch_size: int = 500):
+        self.collection = db.snakes
+        self.db = db
+        self.batch_size = batch_size
+
+    async def all(self):
+        return await self.collection.find({}, {"_id": 0}).to_list(None)
+
+    async def get(self, snake_id):
+        return await self.collection.find_one({"id": snake_id}, {"_id": 0})
+
+    async def get_many(self, ids):
+        return await self.collection.find({"id": {"$in": list(ids)}}, {"_id": 0}).to_list(len(ids))
+
+    async def page(self, limit, after=None, filters=None, fields=None):
+        query = dict(filters or {})
+        if after is not None:
+            name, snake_id = after
+            query = {"$and": [query, {"$or": [
+                {"name": {"$gt": name}},
+                {"name": name, "id": {"$gt": snake_id}},
+            ]}]}
+        projection = {"_id": 0}
+        if fields is not None:
+            projection.update({field: 1 for field in (*fields, "id", "name")})
+        cursor = self.collection.find(query, projection).sort([("name", 1), ("id", 1)]).limit(limit)
+        return await cursor.to_list(limit)
+
+    async def stats(self):
+        # One round trip for all counts
+        pipeline = [{"$facet": {
+            "total": [{"$count": "n"}],
+            "venomous": [{"$match": {"is_venomous": True}}, {"$count": "n"}],
+            "deadly": [{"$match": {"danger_level": "Deadly"}}, {"$count": "n"}],
+            "continents": [{"$group": {"_id": "$continent", "count": {"$sum": 1}}}],
+        }}]
+        result = (await self.collection.aggregate(pipeline).to_list(1))[0]
+        count = lambda facet: facet[0]["n"] if facet else 0
+        return {
+            "total_snakes": count(result["total"]),
+            "venomous_snakes": count(result["venomous"]),
+            "deadly_snakes": count(result["deadly"]),
+            "continents": {item["_id"]: item["count"] for item in result["continents"]},
+        }
+
+    async def iterate(self, filters=None):
+        cursor = self.collection.find(dict(filters or {}), {"_id": 0}).sort("id", 1)
+        async for doc in cursor.batch_size(self.batch_size):
+            yield doc
+
+    async def ping(self):
+        await self.db.command("ping")
+
+
+class MongoEmergencyRepository(EmergencyRepository):
+    def __init__(self, db, batch_size: int = 500):
+        self.collection = db.emergency_info
+        self.batch_size = batch_size
+
+    async def all(self):
+        return await self.collection.find({}, {"_id": 0}).sort("priority", 1).to_list(None)
+
+    async def iterate(self):
+        async for doc in self.collection.find({}, {"_id": 0}).sort("priority", 1).batch_size(self.batch_size):
+            yield doc
+
+
+class MemorySnakeRepository(SnakeRepository):
+    """The whole catalog in a list, pre-sorted for pages"""
+
+    def __init__(self, snakes: Iterable[Dict[str, Any]]):
+        self.snakes = list(snakes)
+        self.by_id = {snake["id"]: snake for snake in self.snakes}
+        self.by_name = sorted(self.snakes, key=lambda snake: (snake["name"], snake["id"]))
+        self._keys = [(snake["name"], snake["id"]) for snake in self.by_name]
+
+    async def all(self):
+        return list(self.snakes)
+
+    async def get(self, snake_id):
+        return self.by_id.get(snake_id)
+
+    async def get_many(self, ids):
+        return [self.by_id[snake_id] for snake_id in dict.fromkeys(ids) if snake_id in self.by_id]
+
+    async def page(self, limit, after=None, filters=None, fields=None):
+        start = bisect_right(self._keys, tuple(after)) if after is not None else 0
+        docs = []
+        for snake in self.by_name[start:]:
+            if _matches(snake, filters):
+                docs.append(_project(snake, fields))
+                if len(docs) == limit:
+                    break
+        return docs
+
+    async def stats(self):
+        return compute_stats(self.snakes)
+
+    async def iterate(self, filters=None):
+        for snake in sorted(self.snakes, key=lambda snake: snake["id"]):
+            if _matches(snake, filters):
+                yield snake
+
+
+class MemoryEmergencyRepository(EmergencyRepository):
+    def __init__(self, emergency_info: Iterable[Dict[str, Any]]):
+        self.emergency_info = sorted(emergency_info, key=lambda info: info.get("priority", 1))
+
+    async def all(self):
+        return list(self.emergency_info)
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snakes (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    continent TEXT,
+    danger_level TEXT,
+    is_venomous INTEGER,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snakes_name_id ON snakes (name, id);
+CREATE INDEX IF NOT EXISTS snakes_continent_danger_level ON snakes (continent, danger_level);
+CREATE INDEX IF NOT EXISTS snakes_danger_level ON snakes (danger_level);
+CREATE TABLE IF NOT EXISTS emergency_info (
+    id TEXT PRIMARY KEY,
+    priority INTEGER,
+    doc TEXT NOT NULL
+);
+"""
+
+
+def build_sqlite(path: Path, snakes: Iterable[Dict[str, Any]], emergency_info: Iterable[Dict[str, Any]]) -> int:
+    """Write a fresh SQLite catalog to `path`, replacing it atomically; returns the snake count"""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp)
+    count = 0
+    try:
+        conn.executescript(SQLITE_SCHEMA)
+        with conn:
+            for snake in snakes:
+                conn.execute(
+                    "INSERT INTO snakes (id, name, continent, danger_level, is_venomous, doc) VALUES (?, ?, ?, ?, ?, ?)",
+                    (snake["id"], snake["name"], snake.get("continent"), snake.get("danger_level"),
+                     int(bool(snake.get("is_venomous"))), encode_json(snake).decode()),
+                )
+                count += 1
+            conn.executemany(
+                "INSERT INTO emergency_info (id, priority, doc) VALUES (?, ?, ?)",
+                [(info.get("id"), info.get("priority", 1), encode_json(info).decode()) for info in emergency_info],
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    tmp.replace(path)
+    return count
+
+
+class SQLiteCatalog:
+    """A read-only connection to a catalog file written by build_sqlite.
+
+    Queries hit indexes on a local file and take microseconds, so they run
+    inline on the event loop; only whole-catalog reads go to a thread.
+    """
+
+    def __init__(self, path: Path):
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[Tuple]:
+        return self.conn.execute(sql, params).fetchall()
+
+    def docs(self, sql: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        return [json.loads(row[0]) for row in self.conn.execute(sql, params)]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _where(filters: Optional[Dict[str, Any]], clauses: Optional[List[str]] = None) -> Tuple[str, List[Any]]:
+    clauses = list(clauses or [])
+    params: List[Any] = []
+    for field, value in (filters or {}).items():
+        if field not in FILTER_FIELDS:
+            raise ValueError(f"Cannot filter on {field!r}")
+        clauses.append(f"{field} = ?")
+        params.append(value)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+class SQLiteSnakeRepository(SnakeRepository):
+    def __init__(self, catalog: SQLiteCatalog):
+        self.catalog = catalog
+
+    async def all(self):
+        return await asyncio.to_thread(self.catalog.docs, "SELECT doc FROM snakes ORDER BY rowid")
+
+    async def get(self, snake_id):
+        docs = self.catalog.docs("SELECT doc FROM snakes WHERE id = ?", (snake_id,))
+        return docs[0] if docs else None
+
+    async def get_many(self, ids):
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return []
+        return self.catalog.docs(f"SELECT doc FROM snakes WHERE id IN ({', '.join('?' * len(ids))})", ids)
+
+    async def page(self, limit, after=None, filters=None, fields=None):
+        where, params = _where(filters, ["(name, id) > (?, ?)"] if after is not None else [])
+        if after is not None:
+            params = [*after, *params]
+        docs = self.catalog.docs(f"SELECT doc FROM snakes{where} ORDER BY name, id LIMIT ?", [*params, limit])
+        return [_project(doc, fields) for doc in docs]
+
+    async def stats(self):
+        (total, venomous, deadly), = self.catalog.query(
+            "SELECT COUNT(*), COALESCE(SUM(is_venomous), 0), COALESCE(SUM(danger_level = 'Deadly'), 0) FROM snakes"
+        )
+        continents = self.catalog.query("SELECT continent, COUNT(*) FROM snakes GROUP BY continent")
+        return {
+            "total_snakes": total,
+            "venomous_snakes": venomous,
+            "deadly_snakes": deadly,
+            "continents": dict(continents),
+        }
+
+    async def iterate(self, filters=None, batch_size: int = 500):
+        last_id = None
+        while True:
+            # Keyset batches, so a slow consumer never holds a read transaction open
+            where, params = _where(filters, ["id > ?"] if last_id is not None else [])
+            if last_id is not None:
+                params.insert(0, last_id)
+            docs = self.catalog.docs(f"SELECT doc FROM snakes{where} ORDER BY id LIMIT ?", [*params, batch_size])
+            for doc in docs:
+                yield doc
+            if len(docs) < batch_size:
+                return
+            last_id = docs[-1]["id"]
+
+    async def ping(self):
+        self.catalog.query("SELECT 1")
+
+
+class SQLiteEmergencyRepository(EmergencyRepository):
+    def __init__(self, catalog: SQLiteCatalog):
+        self.catalog = catalog
+
+    async def all(self):
+        return self.catalog.docs("SELECT doc FROM emergency_info ORDER BY priority, id")
+
+
+def read_export(path: Path) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Read an /api/export dump (NDJSON or JSON, optionally gzipped) into (snakes, emergency_info)"""
+    suffixes = path.suffixes
+    opener = gzip.open if suffixes[-1:] == [".gz"] else open
+    with opener(path, "rt") as f:
+        if ".json" in suffixes:
+            data = json.load(f)
+            return data.get("snakes", []), data.get("emergency_info", [])
+        records = {"snakes": [], "emergency_info": []}
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                records[record["type"]].append(record["data"])
+    return records["snakes"], records["emergency_info"]
+
+
+def main(
+    export: Path = typer.Argument(..., exists=True, dir_okay=False, help="File saved from /api/export"),
+    output: Path = typer.Argument(..., dir_okay=False, help="SQLite file to write"),
+):
+    """Build a SQLite catalog file from an /api/export dump"""
+    snakes, emergency_info = read_export(export)
+    count = build_sqlite(output, snakes, emergency_info)
+    typer.echo(f"Wrote {count} snakes and {len(emergency_info)} emergency info items to {output}")
+
+
+if __name__ == "__main__":
+    typer.run(main)
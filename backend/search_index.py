@@ -0,0 +1,147 @@
+import re
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional
+
+# Field weights used for relevance ranking; a term scores the weight of the
+# best field it matched in.
+FIELD_WEIGHTS = {
+    "name": 10.0,
+    "scientific_name": 6.0,
+    "countries": 4.0,
+    "habitat": 2.0,
+    "identification_features": 2.0,
+}
+
+# Prefix matches (e.g. "cobr" -> "cobra") score less than whole-token matches
+PREFIX_FACTOR = 0.5
+EXACT_NAME_BONUS = 100.0
+NAME_PREFIX_BONUS = 20.0
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _field_values(doc: Dict[str, Any], field: str) -> Iterable[str]:
+    value = doc.get(field)
+    if not value:
+        return ()
+    if isinstance(value, str):
+        return (value,)
+    return value
+
+
+class SearchIndex:
+    """Tokenized inverted index over the searchable snake fields.
+
+    Postings map a token to {snake_id: weight}. Documents are added and
+    removed individually, so `sync` only re-indexes snakes whose content
+    changed since the last call.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_tokens: Dict[str, Dict[str, float]] = {}
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._vocabulary: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, doc: Dict[str, Any]) -> None:
+        doc_id = doc["id"]
+        if doc_id in self._docs:
+            self.remove(doc_id)
+
+        tokens: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for value in _field_values(doc, field):
+                for token in tokenize(value):
+                    if weight > tokens.get(token, 0.0):
+                        tokens[token] = weight
+
+        for token, weight in tokens.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._vocabulary = None
+            postings[doc_id] = weight
+        self._doc_tokens[doc_id] = tokens
+        self._docs[doc_id] = doc
+
+    def remove(self, doc_id: str) -> None:
+        tokens = self._doc_tokens.pop(doc_id, None)
+        self._docs.pop(doc_id, None)
+        if not tokens:
+            return
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[token]
+                self._vocabulary = None
+
+    def sync(self, docs: Iterable[Dict[str, Any]]) -> int:
+        """Bring the index in line with `docs`, returning how many documents changed"""
+        seen = set()
+        changed = 0
+        for doc in docs:
+            doc_id = doc["id"]
+            seen.add(doc_id)
+            if self._docs.get(doc_id) != doc:
+                self.add(doc)
+                changed += 1
+        for doc_id in [doc_id for doc_id in self._docs if doc_id not in seen]:
+            self.remove(doc_id)
+            changed += 1
+        return changed
+
+    def _expand(self, term: str) -> Dict[str, float]:
+        """Return {snake_id: score} for every document matching `term`"""
+        scores = dict(self._postings.get(term, {}))
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        vocabulary = self._vocabulary
+        i = bisect_left(vocabulary, term)
+        while i < len(vocabulary) and vocabulary[i].startswith(term):
+            token = vocabulary[i]
+            i += 1
+            if token == term:
+                continue
+            for doc_id, weight in self._postings[token].items():
+                score = weight * PREFIX_FACTOR
+                if score > scores.get(doc_id, 0.0):
+                    scores[doc_id] = score
+        return scores
+
+    def search(self, query: str) -> List[str]:
+        """Return ids of snakes matching every term in `query`, best match first"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        # Start from the rarest term so the AND intersection stays small
+        expanded = sorted((self._expand(term) for term in terms), key=len)
+        scores = expanded[0]
+        for term_scores in expanded[1:]:
+            scores = {
+                doc_id: score + term_scores[doc_id]
+                for doc_id, score in scores.items()
+                if doc_id in term_scores
+            }
+            if not scores:
+                return []
+
+        phrase = " ".join(terms)
+        for doc_id in scores:
+            name = " ".join(tokenize(self._docs[doc_id].get("name", "")))
+            if name == phrase:
+                scores[doc_id] += EXACT_NAME_BONUS
+            elif name.startswith(phrase):
+                scores[doc_id] += NAME_PREFIX_BONUS
+
+        return sorted(scores, key=lambda doc_id: (-scores[doc_id], self._docs[doc_id].get("name", "")))
@@ -1,427 +1,1317 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteMany, UpdateOne
+from pymongo.errors import PyMongoError
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Optional, Union
 import uuid
-from datetime import datetime
+import base64
+import binascii
+import json
+import zlib
+import asyncio
+import time
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from enum import Enum
 
+from catalog_cache import CatalogCache, content_tag, country_key, encode_json, load_last_known_good, save_last_known_good
+from search_index import FIELD_WEIGHTS, SearchIndex
+from identify import TRAIT_FIELDS, TraitMatcher
+from shared_catalog import SharedCatalog
+from single_flight import FlightTimeout, SingleFlight
+from change_feed import ChangeFeed, ChangeStreamWatcher
+from sightings import BufferFull, SightingBuffer, claim_spills, load_spill, spill, write_sightings
+from admission import AdmissionController, AdmissionMiddleware, RouteClass
+from compression import COMPRESSION_MIN_SIZE, CompressionMiddleware, compress, negotiate, supported_encodings
+from indexes import ensure_indexes
+from metrics import CHANGE_EVENTS, MetricsMiddleware, mongo_listener, registry
+from models import (
+    CATALOG_STATS_ID, CATALOG_VERSION_ID, SNAKE_CARD_FIELDS, EmergencyInfo, Snake, SnakeCard, bump_catalog_version,
+    content_hash, stable_id,
+)
+from repository import (
+    MemoryEmergencyRepository,
+    MemorySnakeRepository,
+    MongoEmergencyRepository,
+    MongoSnakeRepository,
+    SQLiteCatalog,
+    SQLiteEmergencyRepository,
+    SQLiteSnakeRepository,
+    read_export,
+)
+from seed_data import emergency_info, sample_snakes
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection, opened by the lifespan handler; each worker gets its own pool
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '10'))
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000'))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', '30000'))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '2000'))
+# Wire compression, e.g. "zstd,snappy,zlib"; zstd and snappy need their optional packages
+MONGO_COMPRESSORS = os.environ.get('MONGO_COMPRESSORS', '')
+client = None
+db = None
+
+# Where catalog reads come from: "mongo", or a local read replica in "memory"
+# (loaded from CATALOG_EXPORT_PATH, or the seed data) or "sqlite" (CATALOG_SQLITE_PATH,
+# built with `python repository.py`). Writes always need mongo.
+CATALOG_BACKEND = os.environ.get('CATALOG_BACKEND', 'mongo')
+CATALOG_EXPORT_PATH = os.environ.get('CATALOG_EXPORT_PATH')
+CATALOG_SQLITE_PATH = os.environ.get('CATALOG_SQLITE_PATH', str(ROOT_DIR / 'catalog.sqlite'))
+snake_repository = None
+emergency_repository = None
+
+# Readiness for /readyz: set once connections and caches are warm
+READY_PING_TIMEOUT = float(os.environ.get('READY_PING_TIMEOUT', '1.0'))
+ready = False
+
+# In-process snapshot of the catalog, invalidated on every write
+catalog_cache = CatalogCache(
+    max_entries=int(os.environ.get('CATALOG_CACHE_MAX_ENTRIES', '256')),
+    retry_after=float(os.environ.get('CATALOG_RETRY_AFTER', '5')),
+)
+search_index = SearchIndex()
+# Trait matrix for /identify, rebuilt lazily when the snapshot version changes
+trait_matcher = None
+IDENTIFY_MAX_RESULTS = int(os.environ.get('IDENTIFY_MAX_RESULTS', '20'))
+registry.gauge("catalog_cache", "Catalog cache version, size and hit counts", ("stat",),
+               lambda: {(stat,): value for stat, value in catalog_cache.stats().items()})
+
+# Catalog snapshot shared by the workers on this host (see shared_catalog.py),
+# built once per change instead of once per worker. Off unless a directory is
+# given, ideally on tmpfs such as /dev/shm/serpentaware
+CATALOG_SHARED_DIR = os.environ.get('CATALOG_SHARED_DIR', '')
+# What workers keep of each snake from the shared file: the card, plus what
+# search, /identify and the country index read. The rest is read from the file
+SHARED_INDEX_FIELDS = tuple(dict.fromkeys([
+    *SNAKE_CARD_FIELDS, *FIELD_WEIGHTS, "countries", "identification_features", "size_range",
+]))
+shared_catalog = None
+if CATALOG_SHARED_DIR and CATALOG_SHARED_DIR != 'off':
+    shared_catalog = SharedCatalog(
+        Path(CATALOG_SHARED_DIR),
+        check_interval=float(os.environ.get('CATALOG_SHARED_CHECK_INTERVAL', '0.5')),
+        index_fields=SHARED_INDEX_FIELDS,
+        card_fields=SNAKE_CARD_FIELDS,
+    )
+    registry.gauge("shared_catalog", "Shared catalog builds, maps and epoch", ("stat",),
+                   lambda: {(stat,): value for stat, value in shared_catalog.stats().items()})
+
+# Live updates: a MongoDB change stream (replica sets only) patches the catalog
+# as the collections change, and /changes pushes each change to clients
+CHANGE_STREAMS = os.environ.get('CHANGE_STREAMS', 'true').lower() == 'true'
+CHANGE_STREAM_MAX_AWAIT_MS = int(os.environ.get('CHANGE_STREAM_MAX_AWAIT_MS', '500'))
+change_watcher = None
+change_feed = ChangeFeed(
+    history=int(os.environ.get('CHANGE_FEED_HISTORY', '256')),
+    queue_size=int(os.environ.get('CHANGE_FEED_QUEUE', '64')),
+    max_subscribers=int(os.environ.get('CHANGE_FEED_MAX_SUBSCRIBERS', '1000')),
+    heartbeat=float(os.environ.get('CHANGE_FEED_HEARTBEAT', '15')),
+)
+registry.gauge("change_feed", "Live update subscribers, events published and queued", ("stat",),
+               lambda: {(stat,): value for stat, value in change_feed.stats().items()})
+
+# Concurrency budgets per route class, highest priority first. The lower
+# classes' limits leave headroom in the shared total for emergency and detail
+# lookups
+admission = AdmissionController(
+    [
+        RouteClass.from_env("emergency", priority=3, limit=64, queue_size=512, timeout=2.0),
+        RouteClass.from_env("detail", priority=2, limit=48, queue_size=256, timeout=1.0),
+        RouteClass.from_env("list", priority=1, limit=24, queue_size=128, timeout=0.5, retry_after=2),
+        RouteClass.from_env("report", priority=1, limit=16, queue_size=256, timeout=0.25),
+        RouteClass.from_env("admin", priority=0, limit=2, queue_size=8, timeout=0.25, retry_after=5),
+    ],
+    max_concurrency=int(os.environ.get('ADMISSION_MAX_CONCURRENCY', '64')),
+)
+registry.gauge("admission", "In-flight and queued requests per route class", ("class", "state"), admission.stats)
+
+# Identical concurrent reads share one in-flight query (keyed on the catalog
+# version, so a write never hands out a result computed before it)
+SINGLE_FLIGHT_TIMEOUT = float(os.environ.get('SINGLE_FLIGHT_TIMEOUT', '10'))
+snakes_flight = SingleFlight("snakes", SINGLE_FLIGHT_TIMEOUT)
+stats_flight = SingleFlight("stats", SINGLE_FLIGHT_TIMEOUT)
+lookup_flight = SingleFlight("lookup", SINGLE_FLIGHT_TIMEOUT)
+
+# Pagination for /snakes
+SNAKES_PAGE_SIZE = int(os.environ.get('SNAKES_PAGE_SIZE', '50'))
+SNAKES_MAX_PAGE_SIZE = int(os.environ.get('SNAKES_MAX_PAGE_SIZE', '200'))
+SNAKES_BATCH_MAX = int(os.environ.get('SNAKES_BATCH_MAX', '100'))
+
+# Cache-Control policy per read route, overridable with CACHE_CONTROL_<ROUTE>
+CACHE_CONTROL = {
+    route: os.environ.get(f'CACHE_CONTROL_{route.upper()}', default)
+    for route, default in {
+        "snakes": "public, max-age=60, stale-while-revalidate=300",
+        "snake": "public, max-age=300, stale-while-revalidate=3600, stale-if-error=86400",
+        "continents": "public, max-age=300, stale-while-revalidate=3600",
+        "emergency": "public, max-age=300, stale-while-revalidate=86400, stale-if-error=604800",
+        "stats": "public, max-age=60, stale-while-revalidate=300",
+        "countries": "public, max-age=300, stale-while-revalidate=3600",
+        "bundle": "public, max-age=60, stale-while-revalidate=86400",
+    }.items()
+}
+
+# Recent bundle versions kept so clients can be sent deltas: tag -> {snake id: tag}
+BUNDLE_HISTORY_SIZE = int(os.environ.get('BUNDLE_HISTORY_SIZE', '16'))
+bundle_history = OrderedDict()
+
+# Last catalog that loaded successfully, persisted so a worker that starts
+# while the database is down can still serve emergency and first-aid content
+LAST_KNOWN_GOOD_PATH = Path(os.environ.get('LAST_KNOWN_GOOD_PATH', str(ROOT_DIR / 'last_known_good.json')))
+
+# /emergency serves this precomputed (etag, {encoding: body}) without awaiting
+# anything; a background task refreshes it from the database
+EMERGENCY_REFRESH_SECONDS = float(os.environ.get('EMERGENCY_REFRESH_SECONDS', '30'))
+emergency_response = None
+emergency_refreshed_at = None
+emergency_refresh_failures = 0
+# catalog_meta version last seen; the same task polls it to notice writes by
+# other processes (ingest.py) when no change stream reports them
+catalog_version = None
+registry.gauge("emergency_response", "Age and refresh failures of the precomputed /emergency body", ("stat",),
+               lambda: {
+                   ("age_seconds",): round(time.monotonic() - emergency_refreshed_at, 3) if emergency_refreshed_at else -1,
+                   ("refresh_failures",): emergency_refresh_failures,
+               })
+
+# Sighting reports are acknowledged from an in-process buffer and written in
+# batches (see sightings.py); what is still buffered at shutdown and can't be
+# written within SIGHTINGS_DRAIN_TIMEOUT is spilled to disk and re-queued on start
+SIGHTINGS_SPILL_PATH = Path(os.environ.get('SIGHTINGS_SPILL_PATH', str(ROOT_DIR / 'sightings_spill.ndjson')))
+SIGHTINGS_DRAIN_TIMEOUT = float(os.environ.get('SIGHTINGS_DRAIN_TIMEOUT', '10'))
+SIGHTINGS_RETRY_AFTER = int(os.environ.get('SIGHTINGS_RETRY_AFTER', '5'))
+# How far in the future a report's observed_at may be, for clock skew
+SIGHTINGS_MAX_CLOCK_SKEW = float(os.environ.get('SIGHTINGS_MAX_CLOCK_SKEW', '300'))
+sighting_buffer = SightingBuffer(
+    lambda batch: write_sightings(db, batch),
+    max_size=int(os.environ.get('SIGHTINGS_BUFFER_SIZE', '10000')),
+    batch_size=int(os.environ.get('SIGHTINGS_BATCH_SIZE', '500')),
+    flush_interval=float(os.environ.get('SIGHTINGS_FLUSH_INTERVAL', '1.0')),
+)
+registry.gauge("sightings_buffer", "Sighting reports buffered, accepted, rejected and written", ("stat",),
+               lambda: {(stat,): value for stat, value in sighting_buffer.stats().items()})
+
+# Materialized catalog statistics, kept up to date by the write paths
+MATERIALIZED_STATS = os.environ.get('MATERIALIZED_STATS', 'true').lower() == 'true'
+
+# Streaming export
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '500'))
+EXPORT_CHUNK_SIZE = 16 * 1024
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with the catalog encoder (orjson when available)"""
+
+    def render(self, content) -> bytes:
+        return encode_json(content)
+
+def connect_mongo():
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    }
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    return AsyncIOMotorClient(os.environ['MONGO_URL'], event_listeners=[mongo_listener], **options)
+
+def open_replica():
+    """Open the local read replica selected by CATALOG_BACKEND; returns (snakes, emergency, closer)"""
+    if CATALOG_BACKEND == "sqlite":
+        catalog = SQLiteCatalog(Path(CATALOG_SQLITE_PATH))
+        return SQLiteSnakeRepository(catalog), SQLiteEmergencyRepository(catalog), catalog.close
+    if CATALOG_BACKEND == "memory":
+        if CATALOG_EXPORT_PATH:
+            snakes, emergency = read_export(Path(CATALOG_EXPORT_PATH))
+        else:
+            # A fixed created_at keeps content tags, and so ETags and bundle
+            # versions, the same across workers and restarts
+            snakes = [
+                Snake(id=stable_id("snake", item["scientific_name"]), created_at=SEED_CREATED_AT, **item).model_dump(mode="json")
+                for item in sample_snakes
+            ]
+            emergency = [
+                EmergencyInfo(id=stable_id("emergency", item["title"]), created_at=SEED_CREATED_AT, **item).model_dump(mode="json")
+                for item in emergency_info
+            ]
+        return MemorySnakeRepository(snakes), MemoryEmergencyRepository(emergency), lambda: None
+    raise RuntimeError(f"Unknown CATALOG_BACKEND {CATALOG_BACKEND!r}; expected mongo, memory or sqlite")
+
+async def start_sightings():
+    """Create the collections (sightings must be a time series) and then start the buffer; retries until it can"""
+    delay = 1.0
+    while True:
+        await asyncio.sleep(delay)
+        try:
+            await ensure_indexes(db)
+        except PyMongoError as e:
+            delay = min(delay * 2, 30.0)
+            logger.error("Could not set up the sightings collections, retrying in %.0fs: %s", delay, e)
+            continue
+        sighting_buffer.start()
+        return
+
+async def warm_up():
+    """Open the minimum pool and build the caches the first requests would otherwise pay for"""
+    if db is not None:
+        # Concurrent pings each check out a connection, so the pool is filled now
+        # rather than by the first burst of traffic
+        await asyncio.gather(*(db.command("ping") for _ in range(max(MONGO_MIN_POOL_SIZE, 1))))
+    await catalog_snapshot()
+    await get_catalog_stats()
+
+@asynccontextmanager
+async def lifespan(app):
+    global client, db, snake_repository, emergency_repository, change_watcher, ready
+    restore_last_known_good()
+    close = None
+    watcher = None
+    sightings_starter = None
+    if CATALOG_BACKEND == "mongo":
+        client = connect_mongo()
+        db = client[os.environ['DB_NAME']]
+        snake_repository = MongoSnakeRepository(db, EXPORT_BATCH_SIZE)
+        emergency_repository = MongoEmergencyRepository(db, EXPORT_BATCH_SIZE)
+        close = client.close
+        if CHANGE_STREAMS:
+            # Started before the first load so changes made meanwhile aren't missed
+            change_watcher = ChangeStreamWatcher(
+                db, ["snakes", "emergency_info"], apply_catalog_changes, reload_catalog,
+                max_await_ms=CHANGE_STREAM_MAX_AWAIT_MS,
+            )
+            watcher = asyncio.create_task(change_watcher.run())
+        for claimed in claim_spills(SIGHTINGS_SPILL_PATH):
+            try:
+                sighting_buffer.extend(load_spill(claimed))
+            except ValueError as e:
+                logger.error("Could not read spilled sightings from %s, leaving it in place: %s", claimed, e)
+        try:
+            await ensure_indexes(db)
+            sighting_buffer.start()
+            # Seeding is idempotent, so clients no longer need to call /init-data on load
+            await initialize_data()
+            await refresh_catalog_version()
+            await warm_up()
+        except PyMongoError as e:
+            # Start anyway: /emergency and cached snakes are served from the
+            # last known good catalog, and /readyz reports the outage
+            logger.error("MongoDB unavailable at startup, serving the last known good catalog: %s", e)
+        if not sighting_buffer.started:
+            sightings_starter = asyncio.create_task(start_sightings())
+    else:
+        snake_repository, emergency_repository, close = open_replica()
+        await warm_up()
+    refresher = asyncio.create_task(emergency_refresher())
+    ready = True
+    try:
+        yield
+    finally:
+        # Fail readiness first so the load balancer stops routing here
+        ready = False
+        refresher.cancel()
+        if watcher is not None:
+            watcher.cancel()
+        if sightings_starter is not None:
+            sightings_starter.cancel()
+        change_feed.close()
+        if CATALOG_BACKEND == "mongo":
+            unwritten = await sighting_buffer.close(SIGHTINGS_DRAIN_TIMEOUT)
+            if unwritten:
+                logger.warning("Spilled %d unwritten sightings to %s", len(unwritten), spill(SIGHTINGS_SPILL_PATH, unwritten))
+        close()
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse, lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# Enums
-class Continent(str, Enum):
-    NORTH_AMERICA = "North America"
-    SOUTH_AMERICA = "South America" 
-    EUROPE = "Europe"
-    AFRICA = "Africa"
-    ASIA = "Asia"
-    AUSTRALIA = "Australia"
-
-class DangerLevel(str, Enum):
-    HARMLESS = "Harmless"
-    MILDLY_VENOMOUS = "Mildly Venomous"
-    VENOMOUS = "Venomous"
-    HIGHLY_VENOMOUS = "Highly Venomous"
-    DEADLY = "Deadly"
-
 # Models
-class Snake(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+class SnakePage(BaseModel):
+    items: List[Union[Snake, SnakeCard]]
+    limit: int
+    next_cursor: Optional[str] = None
+
+class SnakeBatchRequest(BaseModel):
+    ids: List[str]
+    view: Optional[str] = Field(None, pattern="^(card|full)$")
+    fields: Optional[str] = None
+
+class SnakeBatch(BaseModel):
+    items: List[Union[Snake, SnakeCard]]
+    missing: List[str]
+
+class IdentifyRequest(BaseModel):
+    head_shape: Optional[str] = None
+    pupil_shape: Optional[str] = None
+    color: Optional[str] = None
+    pattern: Optional[str] = None
+    location: Optional[str] = Field(None, description="Country or continent of the sighting")
+    length_m: Optional[float] = Field(None, gt=0, le=20, description="Approximate length in meters")
+    limit: int = Field(5, ge=1)
+
+class IdentifyCandidate(BaseModel):
+    snake: SnakeCard
+    score: float
+    confidence: float
+    matched_terms: List[str]
+
+class IdentifyResult(BaseModel):
+    candidates: List[IdentifyCandidate]
+    unmatched_terms: List[str]
+
+class SightingReport(BaseModel):
+    species_id: str
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
+    # Defaults to when the report is received
+    observed_at: Optional[datetime] = None
+    # As placed by the reporter's device; used for the per-country counts
+    country: Optional[str] = Field(None, min_length=1, max_length=100)
+    photo_hash: Optional[str] = Field(None, pattern="^[0-9a-fA-F]{32,128}$")
+
+class SightingAck(BaseModel):
+    id: str
+    status: str
+
+class SightingKind(str, Enum):
+    SPECIES = "species"
+    COUNTRY = "country"
+
+class SightingRollup(BaseModel):
+    key: str
     name: str
-    scientific_name: str
-    continent: Continent
-    countries: List[str]
-    danger_level: DangerLevel
-    is_venomous: bool
-    image_url: str
-    description: str
-    habitat: List[str]
-    size_range: str
-    identification_features: List[str]
-    behavior: str
-    diet: str
-    what_to_do: List[str]
-    what_not_to_do: List[str]
-    first_aid: List[str]
-    interesting_facts: List[str]
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-
-class EmergencyInfo(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    title: str
-    icon: str
-    priority: int
-    quick_steps: List[str]
-    emergency_numbers: List[str]
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-
-# Sample snake data
-sample_snakes = [
-    # North America
-    {
-        "name": "Eastern Diamondback Rattlesnake",
-        "scientific_name": "Crotalus adamanteus",
-        "continent": "North America",
-        "countries": ["United States"],
-        "danger_level": "Deadly",
-        "is_venomous": True,
-        "image_url": "https://images.pexels.com/photos/32715145/pexels-photo-32715145.jpeg",
-        "description": "Largest venomous snake in North America, known for its distinctive diamond pattern and loud rattle.",
-        "habitat": ["Pine forests", "Coastal plains", "Scrublands"],
-        "size_range": "3-8 feet (0.9-2.4 meters)",
-        "identification_features": ["Diamond-shaped patterns", "Heavy-bodied", "Prominent rattle", "Heat-sensing pits"],
-        "behavior": "Generally shy but will defend itself vigorously when threatened. Active during day and night.",
-        "diet": "Small mammals, birds, occasionally other reptiles",
-        "what_to_do": ["Back away slowly", "Call emergency services immediately", "Keep victim calm and still", "Remove jewelry near bite site"],
-        "what_not_to_do": ["Don't try to catch or kill the snake", "Don't apply ice to bite", "Don't cut the wound", "Don't use a tourniquet"],
-        "first_aid": ["Call 911 immediately", "Keep bite below heart level", "Remove tight clothing", "Monitor breathing"],
-        "interesting_facts": ["Can strike up to 2/3 of their body length", "Rattle is made of keratin segments", "Heat sensors can detect temperature differences of 0.5°F"]
-    },
-    {
-        "name": "Copperhead",
-        "scientific_name": "Agkistrodon contortrix",
-        "continent": "North America",
-        "countries": ["United States"],
-        "danger_level": "Venomous",
-        "is_venomous": True,
-        "image_url": "https://images.pexels.com/photos/2062316/pexels-photo-2062316.jpeg",
-        "description": "Common venomous snake with distinctive copper-colored head and hourglass patterns.",
-        "habitat": ["Deciduous forests", "Mixed woodlands", "Rocky areas"],
-        "size_range": "2-4 feet (0.6-1.2 meters)",
-        "identification_features": ["Copper-colored head", "Hourglass crossbands", "Elliptical pupils", "Heat-sensing pits"],
-        "behavior": "Tends to freeze when threatened rather than flee. Active at dusk and night.",
-        "diet": "Rodents, frogs, insects, small birds",
-        "what_to_do": ["Seek immediate medical attention", "Keep calm and still", "Note time of bite", "Remove constricting items"],
-        "what_not_to_do": ["Don't panic", "Don't try to suck out venom", "Don't apply heat or cold", "Don't drink alcohol"],
-        "first_aid": ["Get to hospital quickly", "Keep bitten area below heart", "Wash with soap and water", "Cover with clean bandage"],
-        "interesting_facts": ["Babies are born with yellow-tipped tails", "Can remain motionless for hours", "Venom is hemotoxic"]
-    },
-    # South America
-    {
-        "name": "Fer-de-Lance",
-        "scientific_name": "Bothrops asper",
-        "continent": "South America",
-        "countries": ["Colombia", "Venezuela", "Ecuador", "Peru", "Brazil"],
-        "danger_level": "Deadly",
-        "is_venomous": True,
-        "image_url": "https://images.unsplash.com/photo-1670806507392-49c3d52d0266",
-        "description": "Aggressive and deadly pit viper responsible for most snakebite fatalities in Central and South America.",
-        "habitat": ["Tropical rainforests", "Agricultural areas", "Near human settlements"],
-        "size_range": "4-8 feet (1.2-2.4 meters)",
-        "identification_features": ["Triangular head", "Heat-sensing pits", "Varied brown/gray patterns", "Keeled scales"],
-        "behavior": "Highly aggressive when threatened. Often found near human habitation.",
-        "diet": "Small mammals, birds, frogs, other snakes",
-        "what_to_do": ["Get antivenom immediately", "Call emergency services", "Keep victim calm", "Immobilize bitten limb"],
-        "what_not_to_do": ["Don't delay medical treatment", "Don't apply tourniquet", "Don't cut wound", "Don't give alcohol"],
-        "first_aid": ["Rush to nearest hospital", "Keep bite below heart", "Monitor vital signs", "Prepare for potential shock"],
-        "interesting_facts": ["Accounts for 50% of snakebites in its range", "Can inject large amounts of venom", "Young are more venomous than adults"]
-    },
-    # Africa
-    {
-        "name": "Black Mamba",
-        "scientific_name": "Dendroaspis polylepis",
-        "continent": "Africa",
-        "countries": ["South Africa", "Botswana", "Namibia", "Zimbabwe", "Kenya"],
-        "danger_level": "Deadly",
-        "is_venomous": True,
-        "image_url": "https://images.unsplash.com/photo-1703636998491-4f0cffcc6fbd",
-        "description": "Africa's deadliest snake, known for its speed, aggression, and highly potent neurotoxic venom.",
-        "habitat": ["Savannas", "Rocky hills", "Dense forests", "Scrublands"],
-        "size_range": "6-14 feet (1.8-4.3 meters)",
-        "identification_features": ["Dark gray to black color", "Coffin-shaped head", "Black mouth interior", "Long and slender"],
-        "behavior": "Extremely fast and aggressive. Can move up to 12 mph. Highly territorial.",
-        "diet": "Small mammals, birds, eggs",
-        "what_to_do": ["Get antivenom within 20 minutes if possible", "Call emergency immediately", "Keep victim completely still", "Prepare for respiratory support"],
-        "what_not_to_do": ["Don't waste time", "Don't move victim", "Don't try traditional remedies", "Don't give food or water"],
-        "first_aid": ["Race to hospital", "Support breathing if needed", "Keep airway clear", "Monitor consciousness"],
-        "interesting_facts": ["Can kill a human in 15-20 minutes", "Fastest snake in the world", "Named for black mouth, not body color"]
-    },
-    {
-        "name": "Puff Adder",
-        "scientific_name": "Bitis arietans",
-        "continent": "Africa",
-        "countries": ["South Africa", "Kenya", "Tanzania", "Nigeria", "Ghana"],
-        "danger_level": "Highly Venomous",
-        "is_venomous": True,
-        "image_url": "https://images.pexels.com/photos/1660997/pexels-photo-1660997.jpeg",
-        "description": "Responsible for more snakebite fatalities in Africa than any other species due to its wide distribution and aggressive nature.",
-        "habitat": ["Grasslands", "Bush country", "Desert edges", "Agricultural areas"],
-        "size_range": "3-6 feet (0.9-1.8 meters)",
-        "identification_features": ["Thick, heavy body", "Distinctive V-shaped markings", "Large triangular head", "Short tail"],
-        "behavior": "Relies on camouflage and remains motionless. Very aggressive when disturbed.",
-        "diet": "Small mammals, birds, amphibians",
-        "what_to_do": ["Seek immediate medical care", "Keep victim calm and still", "Remove rings and tight clothing", "Monitor breathing"],
-        "what_not_to_do": ["Don't apply ice", "Don't cut bite wound", "Don't give alcohol", "Don't use electric shock"],
-        "first_aid": ["Get to hospital quickly", "Splint bitten limb", "Keep bite below heart level", "Watch for swelling"],
-        "interesting_facts": ["Hisses loudly when threatened", "Can give birth to 60 young at once", "Excellent camouflage makes them hard to spot"]
-    },
-    # Asia
-    {
-        "name": "King Cobra",
-        "scientific_name": "Ophiophagus hannah",
-        "continent": "Asia",
-        "countries": ["India", "China", "Thailand", "Malaysia", "Indonesia"],
-        "danger_level": "Deadly",
-        "is_venomous": True,
-        "image_url": "https://images.unsplash.com/photo-1638855370496-1ec25682adbe",
-        "description": "World's longest venomous snake, capable of delivering enough venom to kill an elephant.",
-        "habitat": ["Dense forests", "Mangrove swamps", "Bamboo thickets", "Near water sources"],
-        "size_range": "8-18 feet (2.4-5.5 meters)",
-        "identification_features": ["Distinctive hood", "Olive-brown coloration", "Chevron patterns", "Large size"],
-        "behavior": "Generally shy but extremely dangerous when threatened. Can rear up to 6 feet high.",
-        "diet": "Primarily other snakes, including venomous species",
-        "what_to_do": ["Get antivenom immediately", "Call emergency services", "Keep victim still", "Support breathing if needed"],
-        "what_not_to_do": ["Don't delay treatment", "Don't panic", "Don't try to catch snake", "Don't use folk remedies"],
-        "first_aid": ["Rush to hospital", "Assist breathing", "Keep bite below heart", "Monitor for paralysis"],
-        "interesting_facts": ["Only snake that builds a nest", "Can inject 7ml of venom in one bite", "Immune to other snake venoms"]
-    },
-    {
-        "name": "Russell's Viper",
-        "scientific_name": "Daboia russelii",
-        "continent": "Asia",
-        "countries": ["India", "Sri Lanka", "Myanmar", "Thailand", "Pakistan"],
-        "danger_level": "Deadly",
-        "is_venomous": True,
-        "image_url": "https://images.unsplash.com/photo-1662103563173-30e577e4e391",
-        "description": "One of the 'Big Four' venomous snakes of India, responsible for thousands of deaths annually.",
-        "habitat": ["Grasslands", "Scrub forests", "Agricultural areas", "Rocky terrain"],
-        "size_range": "3-5 feet (0.9-1.5 meters)",
-        "identification_features": ["Three rows of dark spots", "Flat triangular head", "Prominent supraocular scales", "Keeled scales"],
-        "behavior": "Aggressive and quick to strike. Often found in agricultural areas.",
-        "diet": "Rodents, birds, frogs, crabs",
-        "what_to_do": ["Get polyvalent antivenom", "Reach hospital within hours", "Keep victim calm", "Monitor kidney function"],
-        "what_not_to_do": ["Don't delay treatment", "Don't apply tight bands", "Don't give aspirin", "Don't ignore mild symptoms"],
-        "first_aid": ["Immediate hospitalization", "Watch for bleeding", "Monitor urine output", "Support blood pressure"],
-        "interesting_facts": ["Causes more snakebite deaths than any other species", "Venom affects blood clotting", "Very loud hiss when threatened"]
-    },
-    # Australia
-    {
-        "name": "Inland Taipan",
-        "scientific_name": "Oxyuranus microlepidotus",
-        "continent": "Australia",
-        "countries": ["Australia"],
-        "danger_level": "Deadly",
-        "is_venomous": True,
-        "image_url": "https://images.unsplash.com/photo-1651138666546-e1e276686b59",
-        "description": "World's most venomous snake, with enough venom in one bite to kill 100 adult humans.",
-        "habitat": ["Arid regions", "Channel country", "Cracking clay soils", "Remote areas"],
-        "size_range": "6-8 feet (1.8-2.4 meters)",
-        "identification_features": ["Olive to dark tan color", "Rectangular head scales", "Small eyes", "Seasonal color changes"],
-        "behavior": "Generally shy and reclusive. Rarely encountered by humans.",
-        "diet": "Small mammals, particularly rodents",
-        "what_to_do": ["Get antivenom immediately", "Call flying doctor service", "Keep victim absolutely still", "Prepare for intensive care"],
-        "what_not_to_do": ["Don't waste any time", "Don't move victim", "Don't apply pressure bandage incorrectly", "Don't give up hope"],
-        "first_aid": ["Apply compression bandage", "Splint entire limb", "Mark swelling progression", "Get helicopter evacuation"],
-        "interesting_facts": ["Venom is 50x more toxic than cobra venom", "Also called 'fierce snake'", "Can kill in 30-45 minutes"]
-    },
-    {
-        "name": "Eastern Brown Snake",
-        "scientific_name": "Pseudonaja textilis",
-        "continent": "Australia",
-        "countries": ["Australia"],
-        "danger_level": "Deadly",
-        "is_venomous": True,
-        "image_url": "https://images.pexels.com/photos/16105771/pexels-photo-16105771.jpeg",
-        "description": "Highly aggressive and fast-moving snake, second most venomous land snake in the world.",
-        "habitat": ["Woodlands", "Scrublands", "Grasslands", "Urban areas"],
-        "size_range": "4-7 feet (1.2-2.1 meters)",
-        "identification_features": ["Variable brown coloration", "Round pupils", "Relatively small head", "Smooth scales"],
-        "behavior": "Extremely aggressive and fast. Will pursue threats. Active during day.",
-        "diet": "Small mammals, birds, eggs, other reptiles",
-        "what_to_do": ["Apply pressure-immobilization bandage", "Call emergency 000", "Keep victim still", "Get antivenom quickly"],
-        "what_not_to_do": ["Don't remove bandage", "Don't wash bite site", "Don't cut or suck wound", "Don't give alcohol"],
-        "first_aid": ["Broad pressure bandage", "Splint limb", "Mark time and swelling", "Helicopter to hospital"],
-        "interesting_facts": ["Can move at 12 mph", "Accounts for 60% of snakebite deaths in Australia", "Very territorial during breeding season"]
-    },
-    # Europe
-    {
-        "name": "European Adder",
-        "scientific_name": "Vipera berus",
-        "continent": "Europe",
-        "countries": ["United Kingdom", "Norway", "Sweden", "Germany", "France"],
-        "danger_level": "Venomous",
-        "is_venomous": True,
-        "image_url": "https://images.unsplash.com/photo-1529978515127-dba8c80bbf05",
-        "description": "Only venomous snake native to Britain and most of northern Europe.",
-        "habitat": ["Heathlands", "Moors", "Woodland edges", "Sunny slopes"],
-        "size_range": "2-3 feet (0.6-0.9 meters)",
-        "identification_features": ["Zigzag pattern down back", "V or X mark on head", "Vertical pupils", "Keeled scales"],
-        "behavior": "Generally shy and non-aggressive. Bites are rare and usually defensive.",
-        "diet": "Small mammals, lizards, frogs, birds",
-        "what_to_do": ["Seek medical attention", "Clean wound gently", "Remove jewelry", "Monitor for allergic reaction"],
-        "what_not_to_do": ["Don't panic - rarely fatal", "Don't apply ice", "Don't cut wound", "Don't use tourniquet"],
-        "first_aid": ["Clean with antiseptic", "Take painkiller if needed", "Watch for swelling", "Get medical advice"],
-        "interesting_facts": ["Hibernates for 4-5 months", "Can swim well", "Gives birth to live young"]
-    },
-    {
-        "name": "Grass Snake",
-        "scientific_name": "Natrix natrix",
-        "continent": "Europe",
-        "countries": ["United Kingdom", "Germany", "France", "Poland", "Netherlands"],
-        "danger_level": "Harmless",
-        "is_venomous": False,
-        "image_url": "https://images.unsplash.com/photo-1672697823081-7bbae6d25c1c",
-        "description": "Harmless snake commonly found near water sources across Europe.",
-        "habitat": ["Near water", "Gardens", "Compost heaps", "Woodland edges"],
-        "size_range": "3-6 feet (0.9-1.8 meters)",
-        "identification_features": ["Yellow/orange collar behind head", "Olive-green color", "Round pupils", "Smooth scales"],
-        "behavior": "Non-venomous and harmless. May play dead when threatened.",
-        "diet": "Frogs, toads, fish, small mammals",
-        "what_to_do": ["Leave it alone", "Enjoy observing from distance", "No medical treatment needed if bitten", "Clean minor wounds"],
-        "what_not_to_do": ["Don't kill - they're beneficial", "Don't handle roughly", "Don't be afraid", "Don't confuse with adders"],
-        "first_aid": ["Clean any bite wound", "Apply antiseptic", "No special treatment needed", "Watch for infection"],
-        "interesting_facts": ["Excellent swimmer", "Can hold breath for 30 minutes", "Releases foul smell when threatened"]
-    }
-]
-
-# Emergency information
-emergency_info = [
-    {
-        "title": "Snake Bite Emergency",
-        "icon": "🚨",
-        "priority": 1,
-        "quick_steps": [
-            "Call emergency services immediately",
-            "Keep victim calm and still",
-            "Remove jewelry near bite site",
-            "Do NOT cut, suck, or apply ice to wound",
-            "Take photo of snake if safe to do so"
-        ],
-        "emergency_numbers": ["911 (US)", "000 (Australia)", "112 (Europe)", "102 (India)"]
-    },
-    {
-        "title": "First Aid Basics",
-        "icon": "🏥",
-        "priority": 2,
-        "quick_steps": [
-            "Keep bite below heart level",
-            "Remove tight clothing/jewelry",
-            "Clean wound gently with water",
-            "Cover with clean, dry bandage",
-            "Monitor breathing and consciousness"
-        ],
-        "emergency_numbers": ["Contact local poison control center"]
-    },
-    {
-        "title": "Snake Encounter Safety",
-        "icon": "⚠️",
-        "priority": 3,
-        "quick_steps": [
-            "Back away slowly - don't run",
-            "Give snake space to escape",
-            "Don't try to catch or kill snake",
-            "Wear protective footwear in snake areas",
-            "Use flashlight when walking at night"
-        ],
-        "emergency_numbers": ["Local wildlife control services"]
-    }
-]
+    count: int
+    last_seen: datetime
 
 @api_router.get("/")
 async def root():
     return {"message": "Welcome to SerpentAware API"}
 
-@api_router.get("/snakes", response_model=List[Snake])
-async def get_snakes(continent: Optional[str] = None, danger_level: Optional[str] = None, search: Optional[str] = None):
-    """Get all snakes, optionally filtered by continent, danger level, or search term"""
-    query = {}
-    
+async def read_catalog():
+    """Read and validate the snake catalog and emergency info as JSON-ready dicts"""
+    snakes = await snake_repository.all()
+    snakes = [Snake(**snake).model_dump(mode="json") for snake in snakes]
+    emergency_data = await emergency_repository.all()
+    emergency_data = [EmergencyInfo(**info).model_dump(mode="json") for info in emergency_data]
+    catalog = {"snakes": snakes, "emergency_info": emergency_data}
+    try:
+        await asyncio.to_thread(save_last_known_good, LAST_KNOWN_GOOD_PATH, catalog)
+    except OSError as e:
+        logger.warning("Could not save the last-known-good catalog to %s: %s", LAST_KNOWN_GOOD_PATH, e)
+    return catalog
+
+async def catalog_source_version():
+    """Identify the data read_catalog would read, so a shared snapshot of older data isn't reused"""
+    if db is not None:
+        doc = await db.catalog_meta.find_one({"_id": CATALOG_VERSION_ID}, {"version": 1})
+        return doc["version"] if doc else 0
+    path = CATALOG_SQLITE_PATH if CATALOG_BACKEND == "sqlite" else CATALOG_EXPORT_PATH
+    if path:
+        stat = os.stat(path)
+        return [path, stat.st_mtime_ns, stat.st_size]
+    return SEED_HASH
+
+async def load_catalog():
+    """Load the catalog, from the host's shared snapshot when enabled"""
+    if shared_catalog is None:
+        catalog = await read_catalog()
+    else:
+        catalog = await shared_catalog.load(read_catalog, await catalog_source_version())
+    search_index.sync(catalog["snakes"])
+    global emergency_refreshed_at
+    precompute_emergency(catalog["emergency_info"])
+    emergency_refreshed_at = time.monotonic()
+    return catalog
+
+def watching_changes():
+    """True while this worker's change stream is open and patching the catalog as it changes"""
+    return change_watcher is not None and change_watcher.active
+
+def invalidate_catalog():
+    """Drop this worker's snapshot and tell the other workers and live clients it is stale"""
+    catalog_cache.invalidate()
+    if shared_catalog is not None:
+        shared_catalog.mark_stale()
+    if not watching_changes():
+        # Otherwise the change stream reports the write, in more detail
+        publish_catalog_change(reload=True)
+
+def publish_catalog_change(changed=(), removed=(), emergency=False, reload=False, version=None):
+    """Tell /changes subscribers what changed; they refetch /bundle?since=<their version>"""
+    change_feed.publish("catalog", {
+        "version": version,
+        "changed": sorted(changed),
+        "removed": sorted(removed),
+        "emergency": emergency,
+        "reload": reload,
+    })
+
+async def apply_catalog_changes(changes):
+    """Patch the catalog with a batch of change stream events"""
+    upserts, deletes = {}, set()
+    emergency_changed = reload = False
+    for change in changes:
+        operation = change["operationType"]
+        collection = change.get("ns", {}).get("coll", "")
+        registry.inc(CHANGE_EVENTS, (collection, operation))
+        if collection == "emergency_info":
+            emergency_changed = True
+        elif operation in ("insert", "update", "replace"):
+            doc = change.get("fullDocument")
+            if doc is None:
+                # Deleted since; its delete event follows
+                continue
+            doc.pop("_id", None)
+            snake = Snake(**doc).model_dump(mode="json")
+            upserts[snake["id"]] = snake
+            deletes.discard(snake["id"])
+        elif operation == "delete" and change.get("fullDocumentBeforeChange"):
+            snake_id = change["fullDocumentBeforeChange"]["id"]
+            deletes.add(snake_id)
+            upserts.pop(snake_id, None)
+        else:
+            # A delete without a pre-image to tell us which snake, or a drop,
+            # rename or invalidate
+            reload = True
+
+    emergency = None
+    if emergency_changed:
+        global emergency_refreshed_at
+        emergency = [EmergencyInfo(**info).model_dump(mode="json") for info in await emergency_repository.all()]
+        precompute_emergency(emergency)
+        emergency_refreshed_at = time.monotonic()
+
+    if shared_catalog is not None:
+        # The shared file no longer matches the database; whoever loads it next
+        # rebuilds it. Every worker sees the same events, so report the change
+        # by its cluster time and only the first report moves the pointer
+        cluster_time = changes[-1].get("clusterTime")
+        shared_catalog.mark_stale([cluster_time.time, cluster_time.inc] if cluster_time else None)
+
+    version = None
+    if reload:
+        catalog_cache.invalidate()
+    else:
+        snapshot = catalog_cache.patch(upserts.values(), deletes, emergency)
+        if snapshot is not None:
+            for snake_id in deletes:
+                search_index.remove(snake_id)
+            for snake in upserts.values():
+                search_index.add(snake)
+            version = snapshot.tag
+    publish_catalog_change(upserts, deletes, emergency_changed, reload, version)
+
+async def reload_catalog():
+    """The change stream missed events; reload everything"""
+    catalog_cache.invalidate()
+    if shared_catalog is not None:
+        shared_catalog.mark_stale()
+    publish_catalog_change(reload=True)
+
+def precompute_emergency(info):
+    """Encode and pre-compress the /emergency body; returns False if it is unchanged"""
+    global emergency_response
+    etag = f'W/"{content_tag(info)}"'
+    if emergency_response is not None and emergency_response[0] == etag:
+        return False
+    body = encode_json(info)
+    variants = {None: body}
+    if len(body) >= COMPRESSION_MIN_SIZE:
+        variants.update((encoding, compress(body, encoding)) for encoding in supported_encodings())
+    emergency_response = (etag, variants)
+    return True
+
+async def refresh_emergency():
+    """Re-read emergency info; a failure keeps serving the current body"""
+    global emergency_refreshed_at, emergency_refresh_failures
+    try:
+        info = [EmergencyInfo(**info).model_dump(mode="json") for info in await emergency_repository.all()]
+    except Exception:
+        emergency_refresh_failures += 1
+        logger.exception("Emergency info refresh failed; serving the previous copy")
+        return
+    emergency_refreshed_at = time.monotonic()
+    if precompute_emergency(info):
+        # Changed behind our back (another worker or a direct write); the
+        # catalog snapshot and bundle carry it too
+        invalidate_catalog()
+
+async def refresh_catalog_version():
+    """Drop the catalog if another process has written to it since we last looked"""
+    global catalog_version
+    try:
+        doc = await db.catalog_meta.find_one({"_id": CATALOG_VERSION_ID}, {"version": 1})
+    except PyMongoError:
+        logger.exception("Catalog version check failed")
+        return
+    version = doc["version"] if doc else 0
+    if catalog_version is not None and version != catalog_version:
+        # Not invalidate_catalog(): every worker polls for itself, and a shared
+        # snapshot is checked against this version when it is next loaded
+        catalog_cache.invalidate()
+        publish_catalog_change(reload=True)
+    catalog_version = version
+
+async def emergency_refresher():
+    while True:
+        await asyncio.sleep(EMERGENCY_REFRESH_SECONDS)
+        if watching_changes():
+            # The change stream keeps it current
+            continue
+        await refresh_emergency()
+        if db is not None:
+            await refresh_catalog_version()
+
+def restore_last_known_good():
+    """Serve the saved catalog, or the built-in seed emergency info, until the database answers"""
+    data = load_last_known_good(LAST_KNOWN_GOOD_PATH)
+    if data is not None:
+        catalog_cache.restore(data["snakes"], data["emergency_info"])
+        # Search runs on the index, not the snapshot; the snapshot builds its own country index
+        search_index.sync(data["snakes"])
+        precompute_emergency(data["emergency_info"])
+    else:
+        precompute_emergency([
+            EmergencyInfo(id=stable_id("emergency", info["title"]), **info).model_dump(mode="json")
+            for info in emergency_info
+        ])
+
+async def catalog_snapshot():
+    # While the change stream patches this worker's snapshot, the pointer moving
+    # only means the shared file is out of date, not this snapshot
+    if shared_catalog is not None and not watching_changes() and shared_catalog.changed():
+        catalog_cache.invalidate()
+    snapshot = await catalog_cache.snapshot(load_catalog)
+    if snapshot.tag not in bundle_history:
+        remember_bundle_version(snapshot)
+    return snapshot
+
+def etag_matches(request, etag):
+    """Weak If-None-Match comparison, as RFC 9110 requires for GET"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+def cached_response(route, etag, body=None, request=None, cache_key=None, version=None):
+    """Build a JSON response with validators, or a 304 when the client's copy is current.
+
+    With a `cache_key`, the compressed variant of `body` is kept in the catalog
+    cache next to it, so repeat reads skip compression as well as encoding.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL[route], "Vary": "Accept-Encoding"}
+    if body is None:
+        return Response(status_code=304, headers=headers)
+    if cache_key is not None and len(body) >= COMPRESSION_MIN_SIZE:
+        encoding = negotiate(request.headers.get("accept-encoding"))
+        if encoding:
+            compressed = catalog_cache.get_response((cache_key, encoding))
+            if compressed is None:
+                compressed = compress(body, encoding)
+                catalog_cache.put_response((cache_key, encoding), compressed, version)
+            body = compressed
+            headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def filter_snakes(snapshot, continent=None, danger_level=None, search=None):
+    """Apply the /snakes filters to a catalog snapshot; search results come back ranked"""
+    if search:
+        snakes = [snapshot.by_id[snake_id] for snake_id in search_index.search(search) if snake_id in snapshot.by_id]
+    else:
+        snakes = snapshot.snakes
     if continent:
-        query["continent"] = continent
+        snakes = [snake for snake in snakes if snake["continent"] == continent]
     if danger_level:
-        query["danger_level"] = danger_level
-    
-    snakes = await db.snakes.find(query).to_list(1000)
-    
-    if search:
-        search_term = search.lower()
-        snakes = [snake for snake in snakes if 
-                 search_term in snake.get("name", "").lower() or 
-                 search_term in snake.get("scientific_name", "").lower() or
-                 any(search_term in country.lower() for country in snake.get("countries", []))]
-    
-    return [Snake(**snake) for snake in snakes]
+        snakes = [snake for snake in snakes if snake["danger_level"] == danger_level]
+    return snakes
+
+async def refresh_catalog_stats():
+    """Recompute the materialized stats document from the snakes collection"""
+    stats = await snake_repository.stats()
+    await db.catalog_stats.replace_one(
+        {"_id": CATALOG_STATS_ID},
+        {**stats, "updated_at": datetime.utcnow()},
+        upsert=True,
+    )
+    return stats
+
+async def get_catalog_stats():
+    """Catalog stats, with concurrent callers sharing one read; don't mutate the result"""
+    return await stats_flight.do(("stats", catalog_cache.version), read_catalog_stats)
+
+async def read_catalog_stats():
+    """Read the materialized stats document, building it on first use"""
+    if watching_changes():
+        # Writers only keep the stats document current for their own writes;
+        # the snapshot the change stream patches has every write, and is what
+        # the ETag and /bundle describe
+        return snapshot_stats(await catalog_snapshot())[0]
+    if not MATERIALIZED_STATS or db is None:
+        return await snake_repository.stats()
+    stats = await db.catalog_stats.find_one({"_id": CATALOG_STATS_ID}, {"_id": 0, "updated_at": 0})
+    if stats is None:
+        return await refresh_catalog_stats()
+    # Incremental updates can leave continents at zero; don't report them
+    stats["continents"] = {continent: count for continent, count in stats.get("continents", {}).items() if count > 0}
+    return stats
+
+def encode_cursor(data):
+    return base64.urlsafe_b64encode(encode_json(data)).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, binascii.Error):
+        data = None
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return data
+
+def resolve_fields(view=None, fields=None):
+    """Turn the view/fields parameters into the tuple of fields to return, or None for all"""
+    if fields:
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in requested if field not in Snake.model_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown)}")
+        return tuple(dict.fromkeys(["id", *requested]))
+    if view == "card":
+        return SNAKE_CARD_FIELDS
+    return None
+
+def project(snakes, fields):
+    if fields is None:
+        return snakes
+    return [{field: snake[field] for field in fields if field in snake} for snake in snakes]
+
+def encode_snakes(snapshot, snakes, fields):
+    """Encode `snakes` projected to `fields` as a JSON array.
+
+    With a shared catalog, documents and cards are sliced out of the mapped
+    file, and only other projections reaching past the index fields parse a
+    document from it.
+    """
+    if snapshot.bodies is None:
+        return encode_json(project(snakes, fields))
+    return b"[" + b",".join(encode_snake(snapshot, snake, fields) for snake in snakes) + b"]"
+
+def encode_snake(snapshot, snake, fields):
+    encoded = snapshot.bodies if fields is None else snapshot.cards if fields == SNAKE_CARD_FIELDS else None
+    body = encoded.get(snake["id"]) if encoded is not None else None
+    if body is not None:
+        return body
+    # Snakes patched in since the file was mapped, or looked up in the backend, are held in full
+    if fields is not None and not set(fields) <= set(SHARED_INDEX_FIELDS) and snake["id"] in snapshot.bodies:
+        snake = json.loads(snapshot.bodies.get(snake["id"]))
+    return encode_json(snake if fields is None else project([snake], fields)[0])
+
+def encode_object(encoded, data):
+    """A JSON object of the already-encoded members `encoded` followed by those of `data`"""
+    members = [encode_json(name) + b":" + body for name, body in encoded.items()]
+    rest = encode_json(data)[1:-1]
+    if rest:
+        members.append(rest)
+    return b"{" + b",".join(members) + b"}"
+
+async def fetch_snake_page(filters, limit, cursor=None, fields=None):
+    """Fetch one page ordered by (name, id), letting the backend seek past the cursor.
+
+    `fields` is pushed down as a projection; card pages are validated with the
+    lightweight SnakeCard model and other projections are returned as stored.
+    """
+    after = None
+    if cursor:
+        after = decode_cursor(cursor)
+        if not isinstance(after.get("n"), str) or not isinstance(after.get("i"), str):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after = (after["n"], after["i"])
+    docs = await snake_repository.page(limit + 1, after, filters, fields)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor({"n": docs[-1]["name"], "i": docs[-1]["id"]})
+    if fields is None:
+        items = [Snake(**doc).model_dump(mode="json") for doc in docs]
+    elif fields == SNAKE_CARD_FIELDS:
+        items = [SnakeCard(**doc).model_dump(mode="json") for doc in docs]
+    else:
+        items = project(docs, fields)
+    return {"items": items, "limit": limit, "next_cursor": next_cursor}
+
+def paginate_ranked(snakes, limit, cursor=None):
+    """Page through relevance-ranked search results held in memory"""
+    offset = 0
+    if cursor:
+        offset = decode_cursor(cursor).get("o")
+        if not isinstance(offset, int) or offset < 0:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    items = snakes[offset:offset + limit]
+    next_cursor = encode_cursor({"o": offset + limit}) if offset + limit < len(snakes) else None
+    return {"items": items, "limit": limit, "next_cursor": next_cursor}
+
+@api_router.get("/snakes", response_model=SnakePage)
+async def get_snakes(
+    request: Request,
+    continent: Optional[str] = None,
+    danger_level: Optional[str] = None,
+    search: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=SNAKES_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    view: Optional[str] = Query(None, pattern="^(card|full)$"),
+    fields: Optional[str] = None,
+):
+    """Get all snakes, optionally filtered by continent, danger level, or search term.
+
+    Returns one page ({items, limit, next_cursor}) of at most `limit` snakes, SNAKES_PAGE_SIZE by
+    default; pass `next_cursor` back as `cursor` for the next page. `view=card` or a comma-separated `fields` list trims each snake to those fields.
+    """
+    snapshot = await catalog_snapshot()
+    etag = f'W/"{snapshot.tag}"'
+    if etag_matches(request, etag):
+        return cached_response("snakes", etag)
+
+    limit = limit or SNAKES_PAGE_SIZE
+    key = (continent or None, danger_level or None, search.lower() if search else None, resolve_fields(view, fields),
+           limit, cursor)
+
+    body = catalog_cache.get_response(key)
+    if body is None:
+        async def render():
+            if not search:
+                filters = {}
+                if continent:
+                    filters["continent"] = continent
+                if danger_level:
+                    filters["danger_level"] = danger_level
+                body = encode_json(await fetch_snake_page(filters, limit, cursor, key[3]))
+            else:
+                page = paginate_ranked(filter_snakes(snapshot, *key[:3]), limit, cursor)
+                body = encode_object({"items": encode_snakes(snapshot, page.pop("items"), key[3])}, page)
+            catalog_cache.put_response(key, body, snapshot.version)
+            return body
+
+        body = await snakes_flight.do((snapshot.version, key), render)
+    return cached_response("snakes", etag, body, request, key, snapshot.version)
+
+async def lookup_snakes(ids, fields=None):
+    """Resolve ids in request order from the snapshot, with one backend lookup for any it lacks.
+
+    Returns the encoded {items, missing} response.
+    """
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > SNAKES_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {SNAKES_BATCH_MAX} ids per batch")
+    snapshot = await catalog_snapshot()
+    found = {snake_id: snapshot.by_id[snake_id] for snake_id in ids if snake_id in snapshot.by_id}
+    absent = [snake_id for snake_id in ids if snake_id not in found]
+    if absent:
+        docs = await lookup_flight.do(
+            ("many", catalog_cache.version, tuple(sorted(absent))), lambda: snake_repository.get_many(absent)
+        )
+        found.update((doc["id"], Snake(**doc).model_dump(mode="json")) for doc in docs)
+    items = encode_snakes(snapshot, [found[snake_id] for snake_id in ids if snake_id in found], fields)
+    return Response(
+        content=encode_object({"items": items}, {"missing": [snake_id for snake_id in ids if snake_id not in found]}),
+        media_type="application/json",
+    )
+
+@api_router.get("/snakes/batch", response_model=SnakeBatch)
+async def get_snakes_batch(
+    ids: List[str] = Query([]),
+    view: Optional[str] = Query(None, pattern="^(card|full)$"),
+    fields: Optional[str] = None,
+):
+    """Get several snakes in one request; `ids` may be repeated or comma-separated"""
+    ids = [snake_id.strip() for value in ids for snake_id in value.split(",") if snake_id.strip()]
+    return await lookup_snakes(ids, resolve_fields(view, fields))
+
+@api_router.post("/snakes/batch", response_model=SnakeBatch)
+async def post_snakes_batch(request: SnakeBatchRequest):
+    """Get several snakes in one request, with the ids in the body"""
+    return await lookup_snakes(request.ids, resolve_fields(request.view, request.fields))
 
 @api_router.get("/snakes/{snake_id}", response_model=Snake)
-async def get_snake(snake_id: str):
+async def get_snake(request: Request, snake_id: str):
     """Get a specific snake by ID"""
-    snake = await db.snakes.find_one({"id": snake_id})
-    if not snake:
-        raise HTTPException(status_code=404, detail="Snake not found")
-    return Snake(**snake)
+    snapshot = await catalog_snapshot()
+    snake = snapshot.by_id.get(snake_id)
+    body = None
+    if snake is None:
+        # Not in the snapshot; it may have been written since it was taken
+        try:
+            doc = await lookup_flight.do(("one", catalog_cache.version, snake_id), lambda: snake_repository.get(snake_id))
+        except Exception:
+            logger.exception("Snake lookup failed for %s", snake_id)
+            raise HTTPException(status_code=503, detail="Snake catalog temporarily unavailable")
+        if not doc:
+            raise HTTPException(status_code=404, detail="Snake not found")
+        snake = Snake(**doc).model_dump(mode="json")
+        tag = content_tag(snake)
+        body = encode_json(snake)
+    else:
+        tag = snapshot.snake_tags[snake_id]
+
+    # Strong validators must differ between content codings
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    etag = f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+    if etag_matches(request, etag):
+        return cached_response("snake", etag)
+    key = ("snake", snake_id, tag)
+    if body is None:
+        body = catalog_cache.get_response(key)
+    if body is None:
+        body = snapshot.bodies.get(snake_id) if snapshot.bodies is not None else None
+        if body is None:
+            body = encode_json(snake)
+        catalog_cache.put_response(key, body, snapshot.version)
+    return cached_response("snake", etag, body, request, key, snapshot.version)
 
 @api_router.get("/continents")
-async def get_continents():
+async def get_continents(request: Request):
     """Get all continents with snake counts"""
-    pipeline = [
-        {"$group": {"_id": "$continent", "count": {"$sum": 1}}},
-        {"$sort": {"_id": 1}}
-    ]
-    result = await db.snakes.aggregate(pipeline).to_list(100)
-    return [{"continent": item["_id"], "count": item["count"]} for item in result]
+    etag = f'W/"{(await catalog_snapshot()).tag}"'
+    if etag_matches(request, etag):
+        return cached_response("continents", etag)
+    stats = await get_catalog_stats()
+    continents = [{"continent": continent, "count": count} for continent, count in sorted(stats["continents"].items())]
+    return cached_response("continents", etag, encode_json(continents))
+
+@api_router.get("/countries")
+async def get_countries(request: Request):
+    """Get all countries with snake counts"""
+    snapshot = await catalog_snapshot()
+    etag = f'W/"{snapshot.tag}"'
+    if etag_matches(request, etag):
+        return cached_response("countries", etag)
+    key = ("countries",)
+    body = catalog_cache.get_response(key)
+    if body is None:
+        countries = sorted(
+            ({"country": snapshot.countries[country], "count": len(ids)} for country, ids in snapshot.by_country.items()),
+            key=lambda item: item["country"],
+        )
+        body = encode_json(countries)
+        catalog_cache.put_response(key, body, snapshot.version)
+    return cached_response("countries", etag, body, request, key, snapshot.version)
+
+@api_router.get("/countries/{country}/snakes", response_model=Union[List[Snake], List[SnakeCard]])
+async def get_country_snakes(
+    request: Request,
+    country: str,
+    view: Optional[str] = Query(None, pattern="^(card|full)$"),
+    fields: Optional[str] = None,
+):
+    """Get the snakes found in a country (exact, case-insensitive match)"""
+    snapshot = await catalog_snapshot()
+    country = country_key(country)
+    if country not in snapshot.by_country:
+        raise HTTPException(status_code=404, detail="Country not found")
+    etag = f'W/"{snapshot.tag}"'
+    if etag_matches(request, etag):
+        return cached_response("countries", etag)
+    key = ("country", country, resolve_fields(view, fields))
+    body = catalog_cache.get_response(key)
+    if body is None:
+        snakes = [snapshot.by_id[snake_id] for snake_id in snapshot.by_country[country]]
+        body = encode_snakes(snapshot, snakes, key[2])
+        catalog_cache.put_response(key, body, snapshot.version)
+    return cached_response("countries", etag, body, request, key, snapshot.version)
 
 @api_router.get("/emergency", response_model=List[EmergencyInfo])
-async def get_emergency_info():
-    """Get emergency information and first aid steps"""
-    emergency_data = await db.emergency_info.find().sort("priority", 1).to_list(100)
-    return [EmergencyInfo(**info) for info in emergency_data]
+async def get_emergency_info(request: Request):
+    """Get emergency information and first aid steps.
+
+    Served from a precomputed body without awaiting the database, so it keeps
+    working (possibly stale) when MongoDB is slow or down.
+    """
+    if emergency_response is None:
+        raise HTTPException(status_code=503, detail="Emergency information is not loaded yet")
+    etag, variants = emergency_response
+    if etag_matches(request, etag):
+        return cached_response("emergency", etag)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL["emergency"], "Vary": "Accept-Encoding"}
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    if encoding and encoding in variants:
+        headers["Content-Encoding"] = encoding
+        return Response(content=variants[encoding], media_type="application/json", headers=headers)
+    return Response(content=variants[None], media_type="application/json", headers=headers)
 
 @api_router.get("/stats")
-async def get_stats():
+async def get_stats(request: Request):
     """Get statistics about the snake database"""
-    total_snakes = await db.snakes.count_documents({})
-    venomous_count = await db.snakes.count_documents({"is_venomous": True})
-    deadly_count = await db.snakes.count_documents({"danger_level": "Deadly"})
-    
-    continent_stats = await db.snakes.aggregate([
-        {"$group": {"_id": "$continent", "count": {"$sum": 1}}}
-    ]).to_list(100)
-    
-    return {
-        "total_snakes": total_snakes,
-        "venomous_snakes": venomous_count,
-        "deadly_snakes": deadly_count,
-        "continents": {item["_id"]: item["count"] for item in continent_stats}
+    etag = f'W/"{(await catalog_snapshot()).tag}"'
+    if etag_matches(request, etag):
+        return cached_response("stats", etag)
+    return cached_response("stats", etag, encode_json(await get_catalog_stats()))
+
+@api_router.post("/identify", response_model=IdentifyResult)
+async def identify_snake(request: IdentifyRequest):
+    """Rank likely species for the observed traits, location and length.
+
+    `score` is how much of the observation a species matches (0-1) and
+    `confidence` its share of the probability across the whole catalog.
+    """
+    global trait_matcher
+    if request.limit > IDENTIFY_MAX_RESULTS:
+        raise HTTPException(status_code=400, detail=f"At most {IDENTIFY_MAX_RESULTS} candidates per request")
+    snapshot = await catalog_snapshot()
+    if trait_matcher is None or trait_matcher.version != snapshot.version:
+        trait_matcher = TraitMatcher(snapshot.snakes, snapshot.version)
+    result = trait_matcher.rank(
+        {field: getattr(request, field) for field in TRAIT_FIELDS},
+        location=request.location,
+        length=request.length_m,
+        limit=request.limit,
+    )
+    for candidate in result["candidates"]:
+        candidate["snake"] = project([candidate["snake"]], SNAKE_CARD_FIELDS)[0]
+    return FastJSONResponse(result)
+
+@api_router.post("/sightings", response_model=SightingAck, status_code=202)
+async def report_sighting(report: SightingReport):
+    """Report a sighting. It is acknowledged as soon as it is queued, and written in the background"""
+    if db is None:
+        raise HTTPException(status_code=503, detail=f"The {CATALOG_BACKEND} catalog backend is read-only")
+    snapshot = await catalog_snapshot()
+    if report.species_id not in snapshot.by_id:
+        raise HTTPException(status_code=422, detail="Unknown species_id")
+    received_at = datetime.utcnow()
+    observed_at = report.observed_at or received_at
+    if observed_at.tzinfo is not None:
+        observed_at = observed_at.astimezone(timezone.utc).replace(tzinfo=None)
+    if observed_at > received_at + timedelta(seconds=SIGHTINGS_MAX_CLOCK_SKEW):
+        raise HTTPException(status_code=422, detail="observed_at is in the future")
+
+    sighting_id = str(uuid.uuid4())
+    try:
+        sighting_buffer.add({
+            "_id": sighting_id,
+            "observed_at": observed_at,
+            "meta": {"species_id": report.species_id, "country": report.country.strip() if report.country else None},
+            "location": {"type": "Point", "coordinates": [report.longitude, report.latitude]},
+            "photo_hash": report.photo_hash.lower() if report.photo_hash else None,
+            "received_at": received_at,
+        })
+    except BufferFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Sighting reports are backed up, retry shortly",
+            headers={"Retry-After": str(SIGHTINGS_RETRY_AFTER)},
+        )
+    return FastJSONResponse({"id": sighting_id, "status": "queued"}, status_code=202)
+
+@api_router.get("/sightings/rollups", response_model=List[SightingRollup])
+async def get_sighting_rollups(kind: SightingKind = SightingKind.SPECIES, limit: int = Query(50, ge=1, le=500)):
+    """Sighting counts per species or per country, most reported first.
+
+    Counts are kept up to date as reports are written, so they trail the
+    reports by up to one flush.
+    """
+    if db is None:
+        raise HTTPException(status_code=503, detail=f"Sightings need the mongo backend, not {CATALOG_BACKEND}")
+    rollups = await db.sighting_rollups.find(
+        {"kind": kind.value}, {"_id": 0, "key": 1, "name": 1, "count": 1, "last_seen": 1}
+    ).sort([("count", -1)]).limit(limit).to_list(limit)
+    if kind is SightingKind.SPECIES:
+        snapshot = await catalog_snapshot()
+        for rollup in rollups:
+            snake = snapshot.by_id.get(rollup["key"])
+            if snake is not None:
+                rollup["name"] = snake["name"]
+    return FastJSONResponse(rollups)
+
+def snapshot_stats(snapshot):
+    """Stats and continent counts computed from a snapshot, for the bundle"""
+    continents = Counter(snake["continent"] for snake in snapshot.snakes)
+    stats = {
+        "total_snakes": len(snapshot.snakes),
+        "venomous_snakes": sum(1 for snake in snapshot.snakes if snake["is_venomous"]),
+        "deadly_snakes": sum(1 for snake in snapshot.snakes if snake["danger_level"] == "Deadly"),
+        "continents": dict(sorted(continents.items())),
     }
+    return stats, [{"continent": continent, "count": count} for continent, count in sorted(continents.items())]
+
+def bundle_parts(snapshot):
+    stats, continents = snapshot_stats(snapshot)
+    return {"emergency_info": snapshot.emergency_info, "continents": continents, "stats": stats}
+
+def remember_bundle_version(snapshot):
+    """Record what a snapshot contained so later bundles can be sent as deltas against it"""
+    part_tags = {name: content_tag(part) for name, part in bundle_parts(snapshot).items()}
+    bundle_history[snapshot.tag] = {"snakes": snapshot.snake_tags, "parts": part_tags}
+    while len(bundle_history) > BUNDLE_HISTORY_SIZE:
+        bundle_history.popitem(last=False)
+
+def build_bundle(snapshot, since=None):
+    """Encode the full bundle, or the delta from version `since` when we still know it"""
+    parts = bundle_parts(snapshot)
+    current = bundle_history[snapshot.tag]
+    previous = bundle_history.get(since)
+    if previous is None:
+        cards = encode_snakes(snapshot, snapshot.snakes, SNAKE_CARD_FIELDS)
+        return encode_object({"snakes": cards}, {"version": snapshot.tag, "full": True, **parts})
+
+    old_tags = previous["snakes"]
+    added = [snake_id for snake_id in snapshot.snake_tags if snake_id not in old_tags]
+    changed = [snake_id for snake_id, tag in snapshot.snake_tags.items() if snake_id in old_tags and old_tags[snake_id] != tag]
+    delta = encode_object(
+        {
+            "added": encode_snakes(snapshot, [snapshot.by_id[snake_id] for snake_id in added], SNAKE_CARD_FIELDS),
+            "changed": encode_snakes(snapshot, [snapshot.by_id[snake_id] for snake_id in changed], SNAKE_CARD_FIELDS),
+        },
+        {"removed": [snake_id for snake_id in old_tags if snake_id not in snapshot.snake_tags]},
+    )
+    bundle = {"version": snapshot.tag, "full": False, "since": since}
+    bundle.update((name, part) for name, part in parts.items() if previous["parts"].get(name) != current["parts"][name])
+    return encode_object({"delta": delta}, bundle)
+
+@api_router.get("/bundle")
+async def get_bundle(request: Request, since: Optional[str] = None):
+    """Everything the app needs on load: snake cards, emergency info, continents and stats.
+
+    Pass the `version` of a bundle you already hold as `since` to get only what
+    changed; if it is the current version the response is 304.
+    """
+    snapshot = await catalog_snapshot()
+    etag = f'W/"{snapshot.tag}"'
+    if since == snapshot.tag or etag_matches(request, etag):
+        return cached_response("bundle", etag)
+    key = ("bundle", since if since in bundle_history else None)
+    body = catalog_cache.get_response(key)
+    if body is None:
+        body = build_bundle(snapshot, since)
+        catalog_cache.put_response(key, body, snapshot.version)
+    return cached_response("bundle", etag, body, request, key, snapshot.version)
+
+@api_router.get("/changes")
+async def stream_changes(request: Request):
+    """Server-Sent Events feed of catalog changes, so clients don't have to poll.
+
+    Each `catalog` event lists the snake ids that changed or were removed and
+    whether emergency info changed; `reload: true`, or a `reset` event, means
+    the details were lost. Either way clients refetch /bundle?since=<version>.
+    Reconnecting with Last-Event-ID replays recent events.
+    """
+    if change_feed.full:
+        raise HTTPException(status_code=503, detail="Too many live update subscribers", headers={"Retry-After": "30"})
+    return StreamingResponse(
+        change_feed.stream(request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+async def export_records(filters, fmt, include_emergency):
+    """Yield encoded export records straight off the repository iterators"""
+    sources = [("snakes", snake_repository.iterate(filters))]
+    if include_emergency:
+        sources.append(("emergency_info", emergency_repository.iterate()))
+
+    if fmt == "ndjson":
+        for name, cursor in sources:
+            async for doc in cursor:
+                yield encode_json({"type": name, "data": doc}) + b"\n"
+        return
+
+    yield b"{"
+    for n, (name, cursor) in enumerate(sources):
+        yield (b"," if n else b"") + encode_json(name) + b":["
+        separator = b""
+        async for doc in cursor:
+            yield separator + encode_json(doc)
+            separator = b","
+        yield b"]"
+    yield b"}"
+
+async def buffered(chunks, size=EXPORT_CHUNK_SIZE):
+    """Coalesce small chunks so each send carries a reasonable amount of data"""
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer += chunk
+        if len(buffer) >= size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+async def gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+@api_router.get("/export")
+async def export_catalog(
+    format: str = Query("ndjson", pattern="^(ndjson|json)$"),
+    continent: Optional[str] = None,
+    danger_level: Optional[str] = None,
+    include_emergency: bool = True,
+    gzip: bool = False,
+):
+    """Stream the catalog (and emergency info) as NDJSON or a JSON document"""
+    filters = {}
+    if continent:
+        filters["continent"] = continent
+    if danger_level:
+        filters["danger_level"] = danger_level
+
+    body = buffered(export_records(filters, format, include_emergency))
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    filename = f"serpentaware-export.{format}"
+    if gzip:
+        # A .gz file to download, not a transfer encoding: clients must not unpack it
+        body = gzipped(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(body, media_type=media_type, headers=headers)
+
+SEED_FILTER = {"$or": [{"source": "seed"}, {"source": {"$exists": False}}]}
+seed_lock = asyncio.Lock()
+
+SEED_HASH = content_hash({"snakes": sample_snakes, "emergency_info": emergency_info})
+# created_at of the seed documents a read replica builds without a database
+SEED_CREATED_AT = datetime(1970, 1, 1)
+
+async def sync_seed_collection(collection, model, items, kind, key_field, projection=None):
+    """Upsert changed seed documents and delete stale ones in a single bulk_write.
+
+    Returns the (added, removed) documents, where a changed document appears in
+    both, and the number of documents written.
+    """
+    projection = {"_id": 0, "id": 1, "content_hash": 1, **(projection or {})}
+    existing = {doc["id"]: doc for doc in await collection.find(SEED_FILTER, projection).to_list(None)}
+
+    operations, added, removed = [], [], []
+    seen = set()
+    for item in items:
+        doc_id = stable_id(kind, item[key_field])
+        digest = content_hash(item)
+        seen.add(doc_id)
+        old = existing.get(doc_id)
+        if old is not None and old.get("content_hash") == digest:
+            continue
+        doc = model(id=doc_id, **item).model_dump(mode="json", exclude={"created_at"})
+        operations.append(UpdateOne(
+            {"id": doc_id},
+            {"$set": {**doc, "source": "seed", "content_hash": digest},
+             "$setOnInsert": {"created_at": datetime.utcnow()}},
+            upsert=True,
+        ))
+        added.append(doc)
+        if old is not None:
+            removed.append(old)
+
+    stale = [doc for doc_id, doc in existing.items() if doc_id not in seen]
+    if stale:
+        operations.append(DeleteMany({"id": {"$in": [doc["id"] for doc in stale]}}))
+        removed.extend(stale)
+
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
+    return added, removed, len(added) + len(stale)
 
 # Initialize database with sample data
 @api_router.post("/init-data")
 async def initialize_data():
-    """Initialize database with sample snake and emergency data"""
-    # Clear existing data
-    await db.snakes.delete_many({})
-    await db.emergency_info.delete_many({})
-    
-    # Insert sample snakes
-    snake_objects = [Snake(**snake_data) for snake_data in sample_snakes]
-    await db.snakes.insert_many([snake.dict() for snake in snake_objects])
-    
-    # Insert emergency info
-    emergency_objects = [EmergencyInfo(**info) for info in emergency_info]
-    await db.emergency_info.insert_many([info.dict() for info in emergency_objects])
-    
-    return {"message": f"Initialized {len(sample_snakes)} snakes and {len(emergency_info)} emergency info items"}
+    """Initialize database with sample snake and emergency data.
+
+    Seeding is idempotent: only changed documents are written, and re-running
+    it against an up-to-date database costs a single hash comparison.
+    """
+    global catalog_version
+    if db is None:
+        raise HTTPException(status_code=503, detail=f"The {CATALOG_BACKEND} catalog backend is read-only")
+    message = f"Initialized {len(sample_snakes)} snakes and {len(emergency_info)} emergency info items"
+    meta = await db.catalog_meta.find_one({"_id": "seed"})
+    if meta is not None and meta.get("hash") == SEED_HASH:
+        return {"message": message, "changed": 0}
+
+    async with seed_lock:
+        _, _, snakes_changed = await sync_seed_collection(
+            db.snakes, Snake, sample_snakes, "snake", "scientific_name",
+        )
+        _, _, emergency_changed = await sync_seed_collection(
+            db.emergency_info, EmergencyInfo, emergency_info, "emergency", "title",
+        )
+        changed = snakes_changed + emergency_changed
+        if changed:
+            # Bumped first, so a shared snapshot rebuilt for the invalidation records the new version
+            version = (await bump_catalog_version(db.catalog_meta))["version"]
+            if catalog_version == version - 1:
+                # Only our own write; nothing else to pick up
+                catalog_version = version
+            invalidate_catalog()
+            if MATERIALIZED_STATS and snakes_changed:
+                # Recomputed rather than $inc'd: seed_lock is per process, and
+                # workers seeding an empty database together would each add
+                # the delta they computed from the same empty read
+                await refresh_catalog_stats()
+        await db.catalog_meta.update_one(
+            {"_id": "seed"},
+            {"$set": {"hash": SEED_HASH, "updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+
+    return {"message": message, "changed": changed}
+
+@app.exception_handler(FlightTimeout)
+async def query_timeout(request: Request, exc: FlightTimeout):
+    """A coalesced query ran past SINGLE_FLIGHT_TIMEOUT"""
+    return FastJSONResponse({"detail": "Query timed out"}, status_code=504)
+
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Liveness: the worker is running its event loop"""
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    """Readiness: warm-up has finished and the catalog backend answers a ping"""
+    if not ready:
+        return FastJSONResponse({"status": "starting"}, status_code=503)
+    try:
+        await asyncio.wait_for(snake_repository.ping(), READY_PING_TIMEOUT)
+    except Exception:
+        # The error can name hosts and credentials; it goes to the log only
+        logger.warning("Readiness ping failed", exc_info=True)
+        return FastJSONResponse({"status": "unavailable"}, status_code=503)
+    return {"status": "ready"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics"""
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4")
 
 # Include the router in the main app
 app.include_router(api_router)
 
+app.add_middleware(CompressionMiddleware)
+
+# Inside CORS so shed requests still carry CORS headers and clients can read Retry-After
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -430,13 +1320,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so the recorded latency and size cover compression and CORS too
+app.add_middleware(MetricsMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
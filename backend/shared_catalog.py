@@ -0,0 +1,295 @@
+"""Catalog snapshot shared by every worker process on a host.
+
+One worker at a time (whichever holds the build lock) loads the catalog from
+the database and writes it, already validated and with its per-snake content
+tags and encoded bodies, to an immutable file in a shared directory. Workers
+mmap the current file read-only. A small pointer file names the current
+snapshot and is replaced atomically, so readers always see a complete file.
+Sharing is opt-in:
+
+    CATALOG_SHARED_DIR=/dev/shm/serpentaware uvicorn server:app --workers 8
+
+The full documents, and their card projections, are stored encoded and are
+sliced out of the mapping to build responses, so there is one copy per host
+in the page cache rather than one per worker. Each worker parses only the
+index: for every snake, the `index_fields` it filters, searches and counts
+on. Responses that need other fields read those snakes from the mapping. The
+database read, validation, tagging and encoding are done once per host.
+
+The pointer records the `source` version the snapshot was built from (for
+MongoDB, the catalog_meta counter every writer bumps). A snapshot is reused
+only while the database still reports that version, so one left behind by a
+previous server, or outdated by a write from another process, is rebuilt. A
+write in any worker also marks the pointer stale: every worker notices the
+pointer change within `check_interval`, drops its local snapshot, and the
+first to take the build lock rebuilds it once for the whole host.
+
+File layout: MAGIC, an 8-byte little-endian header length, the JSON header
+(snake tags and section offsets), then the index JSON, the concatenated
+document bodies and the concatenated card bodies.
+"""
+import asyncio
+import fcntl
+import json
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Sequence
+
+from catalog_cache import content_tag, encode_json
+
+MAGIC = b"SACATv2\0"
+_LENGTH = struct.Struct("<Q")
+
+
+class SnakeBodies:
+    """Encoded snakes by id, sliced out of the mapped snapshot file"""
+
+    def __init__(self, buffer: mmap.mmap, offsets: Dict[str, list]):
+        self._buffer = buffer
+        self._offsets = offsets
+
+    def __contains__(self, snake_id: str) -> bool:
+        return snake_id in self._offsets
+
+    def get(self, snake_id: str) -> Optional[bytes]:
+        location = self._offsets.get(snake_id)
+        if location is None:
+            return None
+        offset, length = location
+        return self._buffer[offset:offset + length]
+
+    def excluding(self, snake_ids: Iterable[str]) -> "SnakeBodies":
+        """The same bodies without `snake_ids`, e.g. once those snakes have changed"""
+        offsets = dict(self._offsets)
+        for snake_id in snake_ids:
+            offsets.pop(snake_id, None)
+        return SnakeBodies(self._buffer, offsets)
+
+
+def _project(doc: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    if fields is None:
+        return doc
+    return {field: doc[field] for field in fields if field in doc}
+
+
+def write_snapshot(path: Path, catalog: Dict[str, Any], index_fields: Optional[Sequence[str]] = None,
+                   card_fields: Optional[Sequence[str]] = None) -> None:
+    """Serialize `catalog` ({"snakes", "emergency_info"}) to `path` atomically.
+
+    The index keeps `index_fields` of each snake (all of them if None); card
+    bodies are written when `card_fields` is given.
+    """
+    snakes = catalog["snakes"]
+    index_body = encode_json({
+        "snakes": [_project(snake, index_fields) for snake in snakes],
+        "emergency_info": catalog["emergency_info"],
+    })
+    sections = [[(snake["id"], encode_json(snake)) for snake in snakes]]
+    if card_fields is not None:
+        sections.append([(snake["id"], encode_json(_project(snake, card_fields))) for snake in snakes])
+    # Offsets are relative to the end of the header, whose length depends on them
+    offsets, position = [], len(index_body)
+    for bodies in sections:
+        section = {}
+        for snake_id, body in bodies:
+            section[snake_id] = [position, len(body)]
+            position += len(body)
+        offsets.append(section)
+    header = encode_json({
+        "snake_tags": {snake["id"]: content_tag(snake) for snake in snakes},
+        "index": [0, len(index_body)],
+        "bodies": offsets[0],
+        "cards": offsets[1] if card_fields is not None else None,
+    })
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(_LENGTH.pack(len(header)))
+        f.write(header)
+        f.write(index_body)
+        for bodies in sections:
+            for _, body in bodies:
+                f.write(body)
+    os.replace(tmp, path)
+
+
+def map_snapshot(path: Path) -> Dict[str, Any]:
+    """Map a snapshot file and return CatalogSnapshot keyword arguments"""
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if buffer[:len(MAGIC)] != MAGIC:
+        buffer.close()
+        raise ValueError(f"{path} is not a catalog snapshot")
+    (header_length,) = _LENGTH.unpack_from(buffer, len(MAGIC))
+    base = len(MAGIC) + _LENGTH.size + header_length
+    header = json.loads(buffer[len(MAGIC) + _LENGTH.size:base])
+    offset, length = header["index"]
+    index = json.loads(buffer[base + offset:base + offset + length])
+
+    def bodies(section):
+        return SnakeBodies(buffer, {snake_id: (base + start, size) for snake_id, (start, size) in section.items()})
+
+    return {
+        "snakes": index["snakes"],
+        "emergency_info": index["emergency_info"],
+        "snake_tags": header["snake_tags"],
+        "bodies": bodies(header["bodies"]),
+        "cards": bodies(header["cards"]) if header["cards"] is not None else None,
+    }
+
+
+class FileLock:
+    """An exclusive flock(2) on a file; released by the kernel if the process dies"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    async def acquire_async(self, poll: float = 0.02) -> None:
+        # Polling rather than blocking in a thread, so a cancelled waiter can't
+        # end up owning the lock after it has gone away
+        while not self.acquire(blocking=False):
+            await asyncio.sleep(poll)
+
+    def release(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SharedCatalog:
+    def __init__(self, directory: Path, check_interval: float = 0.5, keep: int = 2,
+                 index_fields: Optional[Sequence[str]] = None, card_fields: Optional[Sequence[str]] = None):
+        self.directory = directory
+        self.index_fields = index_fields
+        self.card_fields = card_fields
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.pointer_path = directory / "current.json"
+        self.check_interval = check_interval
+        self.keep = keep
+        self._seen = None
+        self._checked_at = 0.0
+        self.builds = 0
+        self.maps = 0
+
+    def _pointer_stat(self):
+        try:
+            stat = os.stat(self.pointer_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def read_pointer(self) -> Dict[str, Any]:
+        try:
+            return json.loads(self.pointer_path.read_bytes())
+        except (FileNotFoundError, ValueError):
+            return {"epoch": 0, "file": None, "stale": True}
+
+    def _write_pointer(self, pointer: Dict[str, Any]) -> None:
+        tmp = self.pointer_path.with_name(f"current.{os.getpid()}.tmp")
+        tmp.write_bytes(encode_json(pointer))
+        os.replace(tmp, self.pointer_path)
+
+    def changed(self) -> bool:
+        """True if the pointer moved since this worker last loaded; checked at most every check_interval"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        return self._pointer_stat() != self._seen
+
+    def _current(self, pointer: Dict[str, Any], source: Any) -> bool:
+        return not pointer["stale"] and pointer.get("source") == source
+
+    def mark_stale(self, change: Optional[list] = None) -> None:
+        """Tell every worker on the host, this one included, that the snapshot is out of date.
+
+        `change` orders the change being reported (e.g. its cluster time), so
+        that when every worker reports the same change only the first does.
+        """
+        with FileLock(self.directory / "pointer.lock"):
+            pointer = self.read_pointer()
+            if change is None or pointer.get("change") is None or pointer["change"] < change:
+                self._write_pointer({
+                    **pointer,
+                    "epoch": pointer["epoch"] + 1,
+                    "stale": True,
+                    "change": change or pointer.get("change"),
+                })
+            # The caller drops its own snapshot; no need to notice this change again
+            self._seen = self._pointer_stat()
+
+    def _map(self, name: str) -> Dict[str, Any]:
+        self.maps += 1
+        return map_snapshot(self.directory / name)
+
+    async def load(self, build: Callable[[], Awaitable[Dict[str, Any]]], source: Any = None) -> Dict[str, Any]:
+        """Map the current shared snapshot, building and publishing it first if it is stale.
+
+        `source` is the version of the data `build` would read (any JSON value),
+        read before building so that a write made meanwhile isn't recorded as seen.
+        """
+        self._seen = self._pointer_stat()
+        pointer = self.read_pointer()
+        if self._current(pointer, source):
+            return self._map(pointer["file"])
+
+        lock = FileLock(self.directory / "build.lock")
+        await lock.acquire_async()
+        try:
+            # Whoever held the lock may have just published what we need
+            self._seen = self._pointer_stat()
+            pointer = self.read_pointer()
+            if self._current(pointer, source):
+                return self._map(pointer["file"])
+
+            catalog = await build()
+            name = f"catalog-{pointer['epoch'] + 1}-{os.getpid()}.bin"
+            await asyncio.to_thread(write_snapshot, self.directory / name, catalog, self.index_fields, self.card_fields)
+            with FileLock(self.directory / "pointer.lock"):
+                current = self.read_pointer()
+                # A write that landed while we were building leaves it stale
+                self._write_pointer({
+                    "epoch": current["epoch"] + 1,
+                    "file": name,
+                    "stale": current["epoch"] != pointer["epoch"],
+                    "source": source,
+                    "change": current.get("change"),
+                })
+                self._seen = self._pointer_stat()
+            self.builds += 1
+            self._prune(keep=name)
+            return self._map(name)
+        finally:
+            lock.release()
+
+    def _prune(self, keep: str) -> None:
+        files = sorted(self.directory.glob("catalog-*.bin"), key=lambda path: path.stat().st_mtime_ns, reverse=True)
+        # Unlinking is safe for workers that still have an older file mapped
+        for path in files[self.keep:]:
+            if path.name != keep:
+                path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {"builds": self.builds, "maps": self.maps, "epoch": self.read_pointer()["epoch"]}
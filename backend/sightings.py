@@ -0,0 +1,251 @@
+"""Write-behind ingestion of sighting reports.
+
+POST /sightings only validates a report and appends it to an in-process,
+bounded SightingBuffer. A background task writes buffered reports to the
+`sightings` time-series collection with insert_many, and in the same flush
+bumps the per-species and per-country counters in `sighting_rollups`, so
+reads never aggregate the raw reports.
+
+- Backpressure: once `max_size` reports are waiting (the database is slow or
+  down) new ones are refused and the API answers 503 with Retry-After. The
+  same goes until start() is called, which the API only does once the
+  time-series collection exists: a write before that would create `sightings`
+  as an ordinary collection.
+- Durability: on shutdown the buffer is drained; whatever can't be written
+  before the deadline is spilled to a local NDJSON file and queued again on
+  the next start. Each worker spills to its own file, and a starting worker
+  claims a spill file by renaming it before reading, so workers that start
+  together never queue the same reports twice.
+
+Delivery is at-least-once: a flush that fails part way is retried in full,
+so a report can occasionally be stored and counted twice.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+from pymongo import UpdateOne
+
+from catalog_cache import country_key
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_COUNTRY = "unknown"
+_DATETIME_FIELDS = ("observed_at", "received_at")
+
+
+class BufferFull(Exception):
+    pass
+
+
+def rollup_updates(batch: List[Dict[str, Any]]) -> List[UpdateOne]:
+    """One upsert per species and country in the batch, incrementing its count"""
+    totals: Dict[tuple, list] = {}
+    for report in batch:
+        meta = report["meta"]
+        country = meta.get("country")
+        keys = [
+            ("species", meta["species_id"], meta["species_id"]),
+            ("country", country_key(country) if country else UNKNOWN_COUNTRY, country or UNKNOWN_COUNTRY),
+        ]
+        for kind, key, name in keys:
+            total = totals.setdefault((kind, key), [0, report["observed_at"], name])
+            total[0] += 1
+            total[1] = max(total[1], report["observed_at"])
+    return [
+        UpdateOne(
+            {"_id": f"{kind}:{key}"},
+            {
+                "$inc": {"count": count},
+                "$max": {"last_seen": last_seen},
+                "$setOnInsert": {"kind": kind, "key": key, "name": name},
+            },
+            upsert=True,
+        )
+        for (kind, key), (count, last_seen, name) in totals.items()
+    ]
+
+
+async def write_sightings(db, batch: List[Dict[str, Any]]) -> None:
+    await db.sightings.insert_many(batch, ordered=False)
+    await db.sighting_rollups.bulk_write(rollup_updates(batch), ordered=False)
+
+
+def spill(path: Path, reports: List[Dict[str, Any]]) -> Path:
+    """Write reports that couldn't be written next to `path`, one JSON document per line.
+
+    Every call publishes a new file (`<stem>.<pid>-<ns><suffix>`) with a single
+    rename, so concurrent workers never interleave and no reader sees a partial
+    file. Returns the file written.
+    """
+    target = path.with_name(f"{path.stem}.{os.getpid()}-{time.time_ns()}{path.suffix}")
+    partial = target.with_name(target.name + ".partial")
+    with open(partial, "w", encoding="utf-8") as f:
+        for report in reports:
+            f.write(json.dumps(report, default=datetime.isoformat) + "\n")
+    os.replace(partial, target)
+    return target
+
+
+def claim_spills(path: Path) -> List[Path]:
+    """Take ownership of the spill files for `path` by renaming them for this process.
+
+    A file another worker claimed first has gone by the time we rename it and
+    is skipped. `path` itself is included for files spilled before per-worker
+    names.
+    """
+    candidates = [path, *sorted(path.parent.glob(f"{path.stem}.*{path.suffix}"))]
+    claimed = []
+    for candidate in candidates:
+        target = candidate.with_name(f"{candidate.name}.claimed-{os.getpid()}")
+        try:
+            os.replace(candidate, target)
+        except FileNotFoundError:
+            continue
+        claimed.append(target)
+    return claimed
+
+
+def load_spill(path: Path) -> List[Dict[str, Any]]:
+    """Read and remove a claimed spill file; returns [] if there is none"""
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return []
+    reports = []
+    for line in lines:
+        if not line.strip():
+            continue
+        report = json.loads(line)
+        for field in _DATETIME_FIELDS:
+            if report.get(field):
+                report[field] = datetime.fromisoformat(report[field])
+        reports.append(report)
+    path.unlink(missing_ok=True)
+    return reports
+
+
+class SightingBuffer:
+    def __init__(self, flush: Callable[[List[Dict[str, Any]]], Awaitable[None]], max_size: int = 10000,
+                 batch_size: int = 500, flush_interval: float = 1.0, max_backoff: float = 30.0):
+        self.flush = flush
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.pending: deque = deque()
+        # Until start(); reports recovered with extend() wait for it too
+        self.accepting = False
+        self._in_flight = 0
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self.accepted = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.batches = 0
+        self.flush_failures = 0
+
+    def __len__(self) -> int:
+        return len(self.pending) + self._in_flight
+
+    def add(self, report: Dict[str, Any]) -> None:
+        """Queue a report for the next flush, or raise BufferFull"""
+        if not self.accepting:
+            self.rejected += 1
+            raise BufferFull("Not accepting sightings")
+        if len(self) >= self.max_size:
+            self.rejected += 1
+            raise BufferFull(f"{len(self)} sightings waiting to be written")
+        self.pending.append(report)
+        self.accepted += 1
+        if len(self.pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def extend(self, reports: List[Dict[str, Any]]) -> None:
+        """Queue reports recovered from a spill file, regardless of the bound"""
+        self.pending.extend(reports)
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        self.accepting = True
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        backoff = self.flush_interval
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self.pending:
+                if not await self._flush_batch():
+                    # Reports stay buffered meanwhile, which is what pushes back on clients
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+                    break
+                backoff = self.flush_interval
+
+    async def _flush_batch(self) -> bool:
+        batch = [self.pending.popleft() for _ in range(min(self.batch_size, len(self.pending)))]
+        self._in_flight = len(batch)
+        try:
+            await self.flush(batch)
+        except BaseException as e:
+            # Put the batch back in order, also when cancelled mid-write
+            self.pending.extendleft(reversed(batch))
+            if not isinstance(e, Exception):
+                raise
+            self.flush_failures += 1
+            logger.exception("Writing %d sightings failed; keeping them buffered", len(batch))
+            return False
+        finally:
+            self._in_flight = 0
+        self.flushed += len(batch)
+        self.batches += 1
+        return True
+
+    async def close(self, timeout: float) -> List[Dict[str, Any]]:
+        """Stop accepting and flush what is buffered within `timeout`; returns what couldn't be written"""
+        self.accepting = False
+        if self._task is None:
+            # Never started, so the collection may not be set up; keep everything
+            unwritten = list(self.pending)
+            self.pending.clear()
+            return unwritten
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.pending and loop.time() < deadline:
+            try:
+                flushed = await asyncio.wait_for(self._flush_batch(), deadline - loop.time())
+            except asyncio.TimeoutError:
+                break
+            if not flushed:
+                await asyncio.sleep(min(0.5, max(deadline - loop.time(), 0)))
+        unwritten = list(self.pending)
+        self.pending.clear()
+        return unwritten
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "buffered": len(self),
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "flush_failures": self.flush_failures,
+        }
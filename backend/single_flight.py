@@ -0,0 +1,72 @@
+"""Coalesce identical concurrent queries into one in-flight call.
+
+The first caller for a key (the leader) starts the call; callers that arrive
+while it is running (followers) await the same result instead of issuing
+their own query. Results are shared, so callers must not mutate them.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from metrics import SINGLEFLIGHT_CALLS, SINGLEFLIGHT_FAILURES, registry
+
+
+class FlightTimeout(Exception):
+    """A coalesced call ran past its group's timeout"""
+
+    def __init__(self, group: str, timeout: float):
+        super().__init__(f"{group} call ran past {timeout}s")
+        self.group = group
+        self.timeout = timeout
+
+
+class SingleFlight:
+    def __init__(self, group: str, timeout: Optional[float] = None):
+        self.group = group
+        self.timeout = timeout
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return `await fn()`, sharing one execution among concurrent callers with the same key.
+
+        The call is bounded by `timeout` for everyone; its exception, or
+        FlightTimeout, is raised in every waiter. A waiter that is cancelled
+        does not cancel the call for the others.
+        """
+        future = self._calls.get(key)
+        if future is None:
+            registry.inc(SINGLEFLIGHT_CALLS, (self.group, "leader"))
+            future = asyncio.ensure_future(self._run(fn))
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            registry.inc(SINGLEFLIGHT_CALLS, (self.group, "follower"))
+        return await asyncio.shield(future)
+
+    async def _run(self, fn):
+        if self.timeout is None:
+            return await fn()
+        # Not wait_for: a TimeoutError raised inside fn is its own error, not ours
+        task = asyncio.ensure_future(fn())
+        try:
+            done, _ = await asyncio.wait({task}, timeout=self.timeout)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        if not done:
+            task.cancel()
+            await asyncio.wait({task})
+            raise FlightTimeout(self.group, self.timeout)
+        return task.result()
+
+    def _finish(self, key, future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            reason = "timeout" if isinstance(error, FlightTimeout) else "error"
+            registry.inc(SINGLEFLIGHT_FAILURES, (self.group, reason))
@@ -5,6 +5,7 @@ import sys
 import os
 from dotenv import load_dotenv
 import time
+import uuid
 
 # Load environment variables from frontend/.env to get the backend URL
 load_dotenv("/app/frontend/.env")
@@ -24,6 +25,9 @@ API_URL = f"{BACKEND_URL}/api"
 
 print(f"Using API URL: {API_URL}")
 
+# Seed documents get uuid5 ids in this namespace (backend/models.py SEED_NAMESPACE)
+SEED_NAMESPACE = uuid.UUID("6f0c5d2e-3b1a-4c8e-9a57-2d4b8e1f7c30")
+
 # Test results tracking
 tests_passed = 0
 tests_failed = 0
@@ -98,6 +102,37 @@ def test_init_data():
     
     return True
 
+def test_init_data_idempotent():
+    """Test POST /api/init-data again changes nothing and keeps the seed ids"""
+    snakes = requests.get(f"{API_URL}/snakes", params={"limit": 200}).json()["items"]
+    ids = {snake["scientific_name"]: snake["id"] for snake in snakes}
+    
+    response = requests.post(f"{API_URL}/init-data")
+    if response.status_code != 200:
+        print(f"Error: Unexpected status code {response.status_code}")
+        print(f"Response: {response.text}")
+        return False
+    
+    data = response.json()
+    print(f"Response: {json.dumps(data, indent=2)}")
+    if data.get("changed") != 0:
+        print(f"Error: Re-seeding changed {data.get('changed')} documents, expected 0")
+        return False
+    
+    snakes = requests.get(f"{API_URL}/snakes", params={"limit": 200}).json()["items"]
+    if {snake["scientific_name"]: snake["id"] for snake in snakes} != ids:
+        print("Error: Snake ids changed after re-seeding")
+        return False
+    
+    for scientific_name, snake_id in ids.items():
+        expected = str(uuid.uuid5(SEED_NAMESPACE, f"snake:{scientific_name}"))
+        if snake_id != expected:
+            print(f"Error: {scientific_name} has ID {snake_id}, expected {expected}")
+            return False
+    print(f"All {len(ids)} seed snakes kept their uuid5 ids")
+    
+    return True
+
 def test_get_all_snakes():
     """Test GET /api/snakes to retrieve all snakes"""
     response = requests.get(f"{API_URL}/snakes")
@@ -107,7 +142,7 @@ def test_get_all_snakes():
         print(f"Response: {response.text}")
         return False
     
-    snakes = response.json()
+    snakes = response.json()["items"]
     print(f"Retrieved {len(snakes)} snakes")
     
     # Check if we have the expected number of snakes (11 from the sample data)
@@ -134,6 +169,41 @@ def test_get_all_snakes():
     
     return True
 
+def test_paginate_snakes():
+    """Test GET /api/snakes cursor pages cover the catalog once and reject a bad cursor"""
+    response = requests.get(f"{API_URL}/snakes", params={"limit": 4})
+    page = response.json()
+    ids = [snake["id"] for snake in page["items"]]
+    
+    while page["next_cursor"]:
+        response = requests.get(f"{API_URL}/snakes", params={"limit": 4, "cursor": page["next_cursor"]})
+        if response.status_code != 200:
+            print(f"Error: Unexpected status code {response.status_code}")
+            print(f"Response: {response.text}")
+            return False
+        page = response.json()
+        if len(page["items"]) > 4:
+            print(f"Error: Page of {len(page['items'])} exceeds the limit of 4")
+            return False
+        ids.extend(snake["id"] for snake in page["items"])
+    print(f"Paged through {len(ids)} snakes")
+    
+    if len(ids) != len(set(ids)):
+        print("Error: Pages overlap")
+        return False
+    
+    all_ids = {snake["id"] for snake in requests.get(f"{API_URL}/snakes", params={"limit": 200}).json()["items"]}
+    if set(ids) != all_ids:
+        print(f"Error: Pages cover {len(ids)} snakes, expected {len(all_ids)}")
+        return False
+    
+    response = requests.get(f"{API_URL}/snakes", params={"cursor": "not-a-cursor"})
+    if response.status_code != 400:
+        print(f"Error: Expected 400 for a bad cursor, got {response.status_code}")
+        return False
+    
+    return True
+
 def test_filter_snakes_by_continent():
     """Test GET /api/snakes with continent filter"""
     # Test each continent
@@ -151,7 +221,7 @@ def test_filter_snakes_by_continent():
             print(f"Response: {response.text}")
             return False
         
-        snakes = response.json()
+        snakes = response.json()["items"]
         print(f"Retrieved {len(snakes)} snakes for continent {continent}")
         
         # Check that all snakes are from the specified continent
@@ -179,7 +249,7 @@ def test_filter_snakes_by_danger_level():
             print(f"Response: {response.text}")
             return False
         
-        snakes = response.json()
+        snakes = response.json()["items"]
         print(f"Retrieved {len(snakes)} snakes with danger level {danger_level}")
         
         # Check that all snakes have the specified danger level
@@ -212,7 +282,7 @@ def test_search_snakes():
             print(f"Response: {response.text}")
             return False
         
-        snakes = response.json()
+        snakes = response.json()["items"]
         print(f"Retrieved {len(snakes)} snakes matching search term '{term}'")
         
         if len(snakes) == 0:
@@ -251,7 +321,7 @@ def test_get_snake_by_id():
         print(f"Response: {response.text}")
         return False
     
-    snakes = response.json()
+    snakes = response.json()["items"]
     if not snakes:
         print("Error: No snakes found")
         return False
@@ -420,6 +490,207 @@ def test_get_stats():
     
     return True
 
+def test_get_snakes_batch():
+    """Test GET and POST /api/snakes/batch for multi-id lookups"""
+    response = requests.get(f"{API_URL}/snakes")
+    if response.status_code != 200:
+        print(f"Error: Failed to get snakes list, status code {response.status_code}")
+        return False
+    
+    ids = [snake["id"] for snake in response.json()["items"][:3]]
+    ids.reverse()
+    
+    response = requests.get(f"{API_URL}/snakes/batch", params={"ids": ",".join(ids + ["invalid-id-12345"])})
+    if response.status_code != 200:
+        print(f"Error: Unexpected status code {response.status_code}")
+        print(f"Response: {response.text}")
+        return False
+    
+    batch = response.json()
+    print(f"Retrieved {len(batch['items'])} snakes, missing {batch['missing']}")
+    
+    # Results must come back in request order with the unknown id reported
+    if [snake["id"] for snake in batch["items"]] != ids:
+        print("Error: Batch results are not in request order")
+        return False
+    
+    if batch["missing"] != ["invalid-id-12345"]:
+        print(f"Error: Expected the invalid id to be reported missing, got {batch['missing']}")
+        return False
+    
+    response = requests.post(f"{API_URL}/snakes/batch", json={"ids": ids, "view": "card"})
+    if response.status_code != 200 or [snake["id"] for snake in response.json()["items"]] != ids:
+        print("Error: POST batch lookup did not return the requested snakes")
+        return False
+    
+    return True
+
+def test_export_catalog():
+    """Test GET /api/export streams the catalog as NDJSON"""
+    response = requests.get(f"{API_URL}/export", stream=True)
+    
+    if response.status_code != 200:
+        print(f"Error: Unexpected status code {response.status_code}")
+        print(f"Response: {response.text}")
+        return False
+    
+    records = [json.loads(line) for line in response.iter_lines() if line]
+    print(f"Retrieved {len(records)} export records")
+    
+    snakes = [record for record in records if record["type"] == "snakes"]
+    emergency = [record for record in records if record["type"] == "emergency_info"]
+    
+    if len(snakes) != 11:
+        print(f"Error: Expected 11 snake records, got {len(snakes)}")
+        return False
+    
+    if len(emergency) == 0:
+        print("Error: Export does not contain emergency info records")
+        return False
+    
+    # The JSON variant must contain the same snakes
+    response = requests.get(f"{API_URL}/export", params={"format": "json"})
+    if response.status_code != 200 or len(response.json()["snakes"]) != 11:
+        print("Error: JSON export does not contain 11 snakes")
+        return False
+    
+    return True
+
+def test_conditional_requests():
+    """Test that repeating a GET with If-None-Match returns 304 Not Modified"""
+    snake_id = requests.get(f"{API_URL}/snakes", params={"limit": 1}).json()["items"][0]["id"]
+    
+    for path in ["/snakes", f"/snakes/{snake_id}", "/stats", "/emergency"]:
+        response = requests.get(f"{API_URL}{path}")
+        etag = response.headers.get("ETag")
+        if response.status_code != 200 or not etag:
+            print(f"Error: {path} returned {response.status_code} without an ETag")
+            return False
+        
+        response = requests.get(f"{API_URL}{path}", headers={"If-None-Match": etag})
+        if response.status_code != 304:
+            print(f"Error: {path} with If-None-Match {etag} returned {response.status_code}, expected 304")
+            return False
+        if response.content:
+            print(f"Error: 304 from {path} has a body")
+            return False
+        print(f"{path}: 304 for {etag}")
+    
+    response = requests.get(f"{API_URL}/stats", headers={"If-None-Match": 'W/"stale"'})
+    if response.status_code != 200:
+        print(f"Error: Expected 200 for a stale ETag, got {response.status_code}")
+        return False
+    
+    return True
+
+def test_identify_snake():
+    """Test POST /api/identify ranks the matching species first"""
+    observation = {
+        "head_shape": "coffin-shaped",
+        "color": "dark gray",
+        "location": "Kenya",
+        "length_m": 3,
+    }
+    response = requests.post(f"{API_URL}/identify", json=observation)
+    
+    if response.status_code != 200:
+        print(f"Error: Unexpected status code {response.status_code}")
+        print(f"Response: {response.text}")
+        return False
+    
+    candidates = response.json()["candidates"]
+    print(f"Top candidates: {[(c['snake']['name'], c['confidence']) for c in candidates]}")
+    
+    if not candidates or candidates[0]["snake"]["name"] != "Black Mamba":
+        print("Error: Expected Black Mamba to be the top candidate")
+        return False
+    
+    scores = [candidate["score"] for candidate in candidates]
+    if scores != sorted(scores, reverse=True):
+        print("Error: Candidates are not ranked by score")
+        return False
+    
+    return True
+
+def test_get_bundle():
+    """Test GET /api/bundle returns everything the home page needs"""
+    response = requests.get(f"{API_URL}/bundle")
+    
+    if response.status_code != 200:
+        print(f"Error: Unexpected status code {response.status_code}")
+        print(f"Response: {response.text}")
+        return False
+    
+    bundle = response.json()
+    print(f"Bundle version {bundle['version']} with {len(bundle['snakes'])} snakes")
+    
+    for part in ["snakes", "emergency_info", "continents", "stats"]:
+        if part not in bundle:
+            print(f"Error: Bundle is missing '{part}'")
+            return False
+    
+    if not bundle["full"] or len(bundle["snakes"]) != 11:
+        print("Error: Expected a full bundle with 11 snakes")
+        return False
+    
+    # A client already holding the current version gets nothing new
+    response = requests.get(f"{API_URL}/bundle", params={"since": bundle["version"]})
+    if response.status_code != 304:
+        print(f"Error: Expected 304 for the current version, got {response.status_code}")
+        return False
+    
+    return True
+
+def test_stream_changes():
+    """Test GET /api/changes opens a Server-Sent Events stream"""
+    with requests.get(f"{API_URL}/changes", stream=True, timeout=5) as response:
+        if response.status_code != 200:
+            print(f"Error: Unexpected status code {response.status_code}")
+            return False
+        
+        content_type = response.headers.get("content-type", "")
+        if not content_type.startswith("text/event-stream"):
+            print(f"Error: Expected text/event-stream, got {content_type}")
+            return False
+        
+        # The stream opens with the client's reconnect delay
+        first = next(response.iter_lines(decode_unicode=True))
+        print(f"First line: {first}")
+        if not first.startswith("retry:"):
+            print("Error: Expected the stream to start with a retry field")
+            return False
+    
+    return True
+
+def test_report_sighting():
+    """Test POST /api/sightings queues a report that shows up in the rollups"""
+    response = requests.get(f"{API_URL}/snakes", params={"limit": 1})
+    snake = response.json()["items"][0]
+    
+    report = {"species_id": snake["id"], "latitude": -1.29, "longitude": 36.82, "country": "Kenya"}
+    response = requests.post(f"{API_URL}/sightings", json=report)
+    if response.status_code != 202:
+        print(f"Error: Unexpected status code {response.status_code}")
+        print(f"Response: {response.text}")
+        return False
+    print(f"Queued sighting {response.json()['id']}")
+    
+    response = requests.post(f"{API_URL}/sightings", json={**report, "species_id": "not-a-snake"})
+    if response.status_code != 422:
+        print(f"Error: Expected 422 for an unknown species, got {response.status_code}")
+        return False
+    
+    # Reports are written in the background, at least once a second
+    time.sleep(2)
+    response = requests.get(f"{API_URL}/sightings/rollups", params={"kind": "species"})
+    counts = {rollup["key"]: rollup["count"] for rollup in response.json()}
+    print(f"{snake['name']} sightings: {counts.get(snake['id'], 0)}")
+    if counts.get(snake["id"], 0) < 1:
+        print("Error: Sighting not counted in the species rollup")
+        return False
+    
+    return True
+
 def run_all_tests():
     """Run all tests and print a summary"""
     print("\n" + "=" * 80)
@@ -432,14 +703,23 @@ def run_all_tests():
         return
     
     # Run all other tests
+    run_test("Re-initialize Database", test_init_data_idempotent)
     run_test("Get All Snakes", test_get_all_snakes)
+    run_test("Paginate Snakes", test_paginate_snakes)
     run_test("Filter Snakes by Continent", test_filter_snakes_by_continent)
     run_test("Filter Snakes by Danger Level", test_filter_snakes_by_danger_level)
     run_test("Search Snakes", test_search_snakes)
     run_test("Get Snake by ID", test_get_snake_by_id)
+    run_test("Get Snakes Batch", test_get_snakes_batch)
     run_test("Get Continents", test_get_continents)
     run_test("Get Emergency Info", test_get_emergency_info)
     run_test("Get Stats", test_get_stats)
+    run_test("Conditional Requests", test_conditional_requests)
+    run_test("Identify Snake", test_identify_snake)
+    run_test("Get Bundle", test_get_bundle)
+    run_test("Stream Changes", test_stream_changes)
+    run_test("Report Sighting", test_report_sighting)
+    run_test("Export Catalog", test_export_catalog)
     
     # Print summary
     print("\n" + "=" * 80)
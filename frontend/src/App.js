@@ -4,10 +4,14 @@ import axios from 'axios';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
+const BUNDLE_KEY = 'serpentaware-bundle';
 
 function App() {
   const [currentView, setCurrentView] = useState('home');
   const [snakes, setSnakes] = useState([]);
+  const [catalog, setCatalog] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [snakesQuery, setSnakesQuery] = useState({ continent: '', search: '' });
   const [selectedSnake, setSelectedSnake] = useState(null);
   const [selectedContinent, setSelectedContinent] = useState('');
   const [continents, setContinents] = useState([]);
@@ -17,57 +21,70 @@ function App() {
   const [stats, setStats] = useState({});
 
   useEffect(() => {
-    initializeData();
-    fetchContinents();
-    fetchEmergencyInfo();
-    fetchStats();
+    fetchBundle();
+    // Catalog changes are pushed; each one is picked up as a bundle delta
+    const changes = new EventSource(`${API}/changes`);
+    changes.addEventListener('catalog', fetchBundle);
+    changes.addEventListener('reset', fetchBundle);
+    return () => changes.close();
   }, []);
 
-  const initializeData = async () => {
-    try {
-      await axios.post(`${API}/init-data`);
-      console.log('Data initialized successfully');
-    } catch (error) {
-      console.error('Error initializing data:', error);
-    }
-  };
-
-  const fetchContinents = async () => {
-    try {
-      const response = await axios.get(`${API}/continents`);
-      setContinents(response.data);
-    } catch (error) {
-      console.error('Error fetching continents:', error);
+  const applyBundle = (cached, bundle) => {
+    if (bundle.full || !cached) {
+      return bundle;
     }
+    const { added, changed, removed } = bundle.delta;
+    const dropped = new Set([...removed, ...changed.map((snake) => snake.id)]);
+    return {
+      ...cached,
+      ...bundle,
+      full: true,
+      snakes: cached.snakes.filter((snake) => !dropped.has(snake.id)).concat(added, changed),
+    };
   };
 
-  const fetchEmergencyInfo = async () => {
+  const fetchBundle = async () => {
+    let cached = null;
     try {
-      const response = await axios.get(`${API}/emergency`);
-      setEmergencyInfo(response.data);
+      cached = JSON.parse(localStorage.getItem(BUNDLE_KEY));
     } catch (error) {
-      console.error('Error fetching emergency info:', error);
+      localStorage.removeItem(BUNDLE_KEY);
     }
-  };
-
-  const fetchStats = async () => {
     try {
-      const response = await axios.get(`${API}/stats`);
-      setStats(response.data);
+      const response = await axios.get(`${API}/bundle`, {
+        params: cached ? { since: cached.version } : {},
+        validateStatus: (status) => status === 200 || status === 304,
+      });
+      const bundle = response.status === 304 ? cached : applyBundle(cached, response.data);
+      localStorage.setItem(BUNDLE_KEY, JSON.stringify(bundle));
+      setCatalog(bundle.snakes);
+      setContinents(bundle.continents);
+      setEmergencyInfo(bundle.emergency_info);
+      setStats(bundle.stats);
     } catch (error) {
-      console.error('Error fetching stats:', error);
+      console.error('Error fetching bundle:', error);
+      if (cached) {
+        setCatalog(cached.snakes);
+        setContinents(cached.continents);
+        setEmergencyInfo(cached.emergency_info);
+        setStats(cached.stats);
+      }
     }
   };
 
-  const fetchSnakes = async (continent = '', search = '') => {
+  const fetchSnakes = async (continent = '', search = '', cursor = null) => {
     setLoading(true);
     try {
-      const params = new URLSearchParams();
+      const params = new URLSearchParams({ view: 'card' });
       if (continent) params.append('continent', continent);
       if (search) params.append('search', search);
+      if (cursor) params.append('cursor', cursor);
       
+      // The list is paged; "Load more" appends the page after next_cursor
       const response = await axios.get(`${API}/snakes?${params}`);
-      setSnakes(response.data);
+      setSnakes((current) => (cursor ? current.concat(response.data.items) : response.data.items));
+      setNextCursor(response.data.next_cursor);
+      setSnakesQuery({ continent, search });
     } catch (error) {
       console.error('Error fetching snakes:', error);
     } finally {
@@ -78,12 +95,31 @@ function App() {
   const handleContinentSelect = (continent) => {
     setSelectedContinent(continent);
     setCurrentView('snakes');
-    fetchSnakes(continent);
+    if (!catalog.length) {
+      fetchSnakes(continent);
+      return;
+    }
+    // The bundle already holds every snake card; only search goes to the server
+    setSnakes(
+      catalog
+        .filter((snake) => snake.continent === continent)
+        .sort((a, b) => a.name.localeCompare(b.name))
+    );
+    setNextCursor(null);
   };
 
-  const handleSnakeSelect = (snake) => {
-    setSelectedSnake(snake);
-    setCurrentView('snake-detail');
+  const handleSnakeSelect = async (snake) => {
+    // The grid only holds card summaries; fetch the full record for the detail view
+    setLoading(true);
+    try {
+      const response = await axios.get(`${API}/snakes/${snake.id}`);
+      setSelectedSnake(response.data);
+      setCurrentView('snake-detail');
+    } catch (error) {
+      console.error('Error fetching snake details:', error);
+    } finally {
+      setLoading(false);
+    }
   };
 
   const handleSearch = (e) => {
@@ -223,18 +259,19 @@ function App() {
               {selectedContinent ? `${selectedContinent} Snakes` : 'Search Results'}
             </h1>
             <div className="text-sm text-gray-600">
-              {snakes.length} species found
+              {snakes.length}{nextCursor ? '+' : ''} species found
             </div>
           </div>
         </div>
       </header>
 
       <div className="container mx-auto px-4 py-8">
-        {loading ? (
+        {loading && !snakes.length ? (
           <div className="text-center py-12">
             <div className="text-2xl">🐍 Loading snakes...</div>
           </div>
         ) : (
+          <>
           <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
             {snakes.map((snake) => (
               <div
@@ -263,6 +300,18 @@ function App() {
               </div>
             ))}
           </div>
+          {nextCursor && (
+            <div className="text-center mt-8">
+              <button
+                onClick={() => fetchSnakes(snakesQuery.continent, snakesQuery.search, nextCursor)}
+                disabled={loading}
+                className="bg-green-600 text-white px-6 py-3 rounded-lg hover:bg-green-700 transition-colors disabled:opacity-50"
+              >
+                {loading ? 'Loading...' : 'Load more'}
+              </button>
+            </div>
+          )}
+          </>
         )}
       </div>
     </div>
@@ -0,0 +1,97 @@
+"""Priority admission control under saturation.
+
+    python -m pytest tests
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from admission import AdmissionController, AdmissionMiddleware, Overloaded, RouteClass  # noqa: E402
+
+
+def controller(max_concurrency=2, queue_size=1, timeout=0.05):
+    return AdmissionController(
+        [
+            RouteClass("emergency", priority=3, limit=1, queue_size=queue_size, timeout=timeout),
+            RouteClass("list", priority=1, limit=1, queue_size=queue_size, timeout=timeout, retry_after=2),
+        ],
+        max_concurrency,
+    )
+
+
+def test_rejects_when_the_queue_is_full():
+    async def main():
+        admission = controller()
+        await admission.acquire("list")
+        waiter = asyncio.ensure_future(admission.acquire("list"))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as rejected:
+            await admission.acquire("list")
+        waiter.cancel()
+        return rejected.value
+
+    rejected = asyncio.run(main())
+    assert (rejected.route_class, rejected.reason, rejected.retry_after) == ("list", "queue_full", 2)
+
+
+def test_rejects_waiters_past_the_deadline():
+    async def main():
+        admission = controller()
+        await admission.acquire("list")
+        with pytest.raises(Overloaded) as rejected:
+            await admission.acquire("list")
+        return admission, rejected.value
+
+    admission, rejected = asyncio.run(main())
+    assert rejected.reason == "deadline"
+    assert admission.stats()[("list", "queued")] == 0
+
+
+def test_freed_slots_go_to_the_higher_priority_first():
+    async def main():
+        admission = controller(max_concurrency=1, timeout=1)
+        await admission.acquire("list")
+        low = asyncio.ensure_future(admission.acquire("list"))
+        high = asyncio.ensure_future(admission.acquire("emergency"))
+        await asyncio.sleep(0)
+        admission.release("list")
+        done, _ = await asyncio.wait({low, high}, return_when=asyncio.FIRST_COMPLETED)
+        admission.release("emergency")
+        await low
+        return done, high
+
+    done, high = asyncio.run(main())
+    assert done == {high}
+
+
+def test_middleware_answers_503_for_low_priority_under_saturation():
+    async def main():
+        entered, gate = asyncio.Event(), asyncio.Event()
+
+        async def app(scope, receive, send):
+            if scope["path"] == "/api/snakes":
+                entered.set()
+                await gate.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        transport = httpx.ASGITransport(app=AdmissionMiddleware(app, controller(queue_size=0)))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            slow = asyncio.ensure_future(client.get("/api/snakes"))
+            await entered.wait()
+            busy = await client.get("/api/snakes")
+            emergency = await client.get("/api/emergency")
+            gate.set()
+            return busy, emergency, await slow
+
+    busy, emergency, slow = asyncio.run(main())
+    assert busy.status_code == 503
+    assert busy.headers["retry-after"] == "2"
+    assert busy.json() == {"detail": "Server busy, retry shortly"}
+    assert emergency.status_code == 200
+    assert slow.status_code == 200
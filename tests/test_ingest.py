@@ -0,0 +1,103 @@
+"""Bulk species ingestion against an in-memory MongoDB.
+
+    python -m pytest tests
+"""
+import json
+import sys
+from pathlib import Path
+
+import mongomock
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import ingest  # noqa: E402
+from models import CATALOG_STATS_ID, stable_id  # noqa: E402
+
+
+def row(scientific_name, name=None, continent="Africa"):
+    return {
+        "name": name or scientific_name,
+        "scientific_name": scientific_name,
+        "continent": continent,
+        "countries": ["Kenya"],
+        "danger_level": "Venomous",
+        "is_venomous": True,
+        "image_url": "https://example.com/snake.jpg",
+        "description": "A snake",
+        "habitat": ["Savanna"],
+        "size_range": "1-2 m",
+        "identification_features": ["Long"],
+        "behavior": "Shy",
+        "diet": "Rodents",
+        "what_to_do": ["Back away"],
+        "what_not_to_do": ["Handle it"],
+        "first_aid": ["Call for help"],
+        "interesting_facts": ["Fast"],
+    }
+
+
+@pytest.fixture
+def db(monkeypatch):
+    client = mongomock.MongoClient()
+    monkeypatch.setenv("MONGO_URL", "mongodb://localhost")
+    monkeypatch.setenv("DB_NAME", "ingest_test")
+    monkeypatch.setattr(ingest, "MongoClient", lambda url: client)
+    return client["ingest_test"]
+
+
+def ingest_file(path, chunk_size=2, resume=True):
+    ingest.main(path, source="test", fmt=None, chunk_size=chunk_size, workers=1, rejects_path=None, resume=resume)
+
+
+def test_validate_chunk_rejects_bad_rows():
+    docs, rejects = ingest.validate_chunk([row("Dendroaspis polylepis"), {"name": "No species"}], 10, "test")
+    assert [doc["id"] for doc in docs] == [stable_id("snake", "Dendroaspis polylepis")]
+    assert docs[0]["source"] == "test"
+    assert [reject["row"] for reject in rejects] == [11]
+
+
+def test_clean_row_splits_csv_lists():
+    assert ingest.clean_row({"habitat": "Savanna | Forest", "name": "Mamba"}) == {"habitat": ["Savanna", "Forest"], "name": "Mamba"}
+
+
+def test_write_chunk_keeps_the_last_duplicate(db):
+    docs, _ = ingest.validate_chunk([row("Naja nigricollis", "Old name"), row("Naja nigricollis", "New name")], 0, "test")
+    written, unchanged, failed, inc = ingest.write_chunk(db.snakes, docs)
+    assert (written, unchanged, failed) == (1, 1, [])
+    assert inc["total_snakes"] == 1
+    assert [doc["name"] for doc in db.snakes.find()] == ["New name"]
+
+
+def test_write_chunk_skips_unchanged_docs(db):
+    docs, _ = ingest.validate_chunk([row("Naja nigricollis")], 0, "test")
+    ingest.write_chunk(db.snakes, docs)
+    assert ingest.write_chunk(db.snakes, docs) == (0, 1, [], {})
+
+    docs, _ = ingest.validate_chunk([row("Naja nigricollis", continent="Asia")], 0, "test")
+    written, _, _, inc = ingest.write_chunk(db.snakes, docs)
+    assert written == 1
+    assert inc == {"continents.Asia": 1, "continents.Africa": -1}
+
+
+def test_resumes_after_the_checkpoint(db, tmp_path):
+    path = tmp_path / "snakes.jsonl"
+    path.write_text("".join(json.dumps(row(f"Species {n}")) + "\n" for n in range(5)))
+    # A previous run stopped after the first chunk
+    ingest.save_checkpoint(path.with_name(path.name + ".ingest-checkpoint"), path, 2)
+    ingest_file(path)
+    assert sorted(doc["scientific_name"] for doc in db.snakes.find()) == ["Species 2", "Species 3", "Species 4"]
+    assert not path.with_name(path.name + ".ingest-checkpoint").exists()
+    assert db.catalog_stats.find_one({"_id": CATALOG_STATS_ID}) is None
+
+
+def test_ignores_a_checkpoint_for_a_changed_file(db, tmp_path):
+    path = tmp_path / "snakes.jsonl"
+    checkpoint = path.with_name(path.name + ".ingest-checkpoint")
+    path.write_text(json.dumps(row("Species 0")) + "\n")
+    ingest.save_checkpoint(checkpoint, path, 1)
+    path.write_text("".join(json.dumps(row(f"Species {n}")) + "\n" for n in range(3)))
+    assert ingest.load_checkpoint(checkpoint, path) == 0
+    ingest_file(path)
+    assert db.snakes.count_documents({}) == 3
+    assert db.catalog_meta.find_one({"_id": "version"})["version"] == 2
@@ -0,0 +1,165 @@
+"""Serve the API from the in-memory catalog backend, without a database.
+
+    python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+STATE_DIR = tempfile.mkdtemp()
+os.environ["CATALOG_BACKEND"] = "memory"
+os.environ["LAST_KNOWN_GOOD_PATH"] = os.path.join(STATE_DIR, "last_known_good.json")
+os.environ["CATALOG_SHARED_DIR"] = "off"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from catalog_cache import CatalogCache, CatalogSnapshot, encode_json  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import server  # noqa: E402
+from shared_catalog import map_snapshot, write_snapshot  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(server.app) as client:
+        yield client
+
+
+def all_snakes(client, **params):
+    snakes, cursor = [], None
+    while True:
+        page = client.get("/api/snakes", params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        snakes.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return snakes
+
+
+def test_lists_the_seed_catalog(client):
+    response = client.get("/api/snakes")
+    assert response.status_code == 200
+    page = response.json()
+    assert len(page["items"]) == len(server.sample_snakes)
+    assert page["next_cursor"] is None
+    names = [snake["name"] for snake in page["items"]]
+    assert names == sorted(names)
+
+
+def test_pages_follow_the_cursor(client):
+    paged = all_snakes(client, limit=4)
+    assert [snake["id"] for snake in paged] == [snake["id"] for snake in client.get("/api/snakes").json()["items"]]
+
+
+def test_filters_by_continent(client):
+    snakes = all_snakes(client, continent="Australia", view="card")
+    assert {snake["name"] for snake in snakes} == {"Eastern Brown Snake", "Inland Taipan"}
+    assert "habitat" not in snakes[0]
+
+
+def test_search_ranks_from_the_snapshot(client):
+    names = [snake["name"] for snake in client.get("/api/snakes", params={"search": "cobra"}).json()["items"]]
+    assert names[0] == "King Cobra"
+
+
+def test_gets_a_snake(client):
+    snake = client.get("/api/snakes", params={"limit": 1}).json()["items"][0]
+    response = client.get(f"/api/snakes/{snake['id']}")
+    assert response.status_code == 200
+    assert response.json()["scientific_name"] == snake["scientific_name"]
+    assert client.get("/api/snakes/not-a-snake").status_code == 404
+
+
+def test_revalidates_with_etags(client):
+    snake = client.get("/api/snakes", params={"limit": 1}).json()["items"][0]
+    for path in ["/api/snakes", f"/api/snakes/{snake['id']}", "/api/stats"]:
+        etag = client.get(path).headers["etag"]
+        response = client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+    assert client.get("/api/stats", headers={"If-None-Match": 'W/"stale"'}).status_code == 200
+
+
+def test_seed_replica_is_the_same_in_every_worker():
+    first, second = server.open_replica()[0], server.open_replica()[0]
+    assert first.snakes == second.snakes
+
+
+def test_counts_snakes_per_country(client):
+    counts = {item["country"]: item["count"] for item in client.get("/api/countries").json()}
+    assert sum(counts.values()) == sum(len(snake["countries"]) for snake in server.sample_snakes)
+    assert counts["India"] == 2
+    assert list(counts) == sorted(counts)
+
+
+def test_matches_a_country_exactly(client):
+    india = {snake["id"] for snake in client.get("/api/countries/India/snakes").json()}
+    assert len(india) == 2
+    for variant in ["india", " INDIA ", "Índia"]:
+        assert {snake["id"] for snake in client.get(f"/api/countries/{variant}/snakes").json()} == india
+    assert client.get("/api/countries/Indi/snakes").status_code == 404
+    indonesia = client.get("/api/countries/Indonesia/snakes", params={"view": "card"}).json()
+    assert [snake["name"] for snake in indonesia] == ["King Cobra"]
+    assert "habitat" not in indonesia[0]
+
+
+def test_encodes_snakes_from_a_shared_catalog_file(tmp_path):
+    snakes = server.open_replica()[0].snakes
+    write_snapshot(tmp_path / "catalog.bin", {"snakes": snakes, "emergency_info": []},
+                   server.SHARED_INDEX_FIELDS, server.SNAKE_CARD_FIELDS)
+    snapshot = CatalogSnapshot(1, **map_snapshot(tmp_path / "catalog.bin"))
+    for fields in [None, server.SNAKE_CARD_FIELDS, ("id", "name", "countries"), ("id", "first_aid")]:
+        assert server.encode_snakes(snapshot, snapshot.snakes, fields) == encode_json(server.project(snakes, fields))
+
+
+def test_stats_match_the_catalog(client):
+    stats = client.get("/api/stats").json()
+    assert stats["total_snakes"] == len(server.sample_snakes)
+    assert sum(stats["continents"].values()) == stats["total_snakes"]
+
+
+def fail_reads(monkeypatch):
+    async def unavailable(*args, **kwargs):
+        raise ConnectionError("catalog backend is down")
+
+    monkeypatch.setattr(server.snake_repository, "all", unavailable)
+    monkeypatch.setattr(server.emergency_repository, "all", unavailable)
+
+
+def serves_stale_catalog(client, snake_id):
+    assert client.get(f"/api/snakes/{snake_id}").status_code == 200
+    assert client.get("/api/emergency").status_code == 200
+    response = client.get("/api/snakes", params={"search": "cobra"})
+    assert response.status_code == 200
+    assert response.json()["items"][0]["name"] == "King Cobra"
+
+
+def test_serves_the_last_good_catalog_when_reloading_fails(client, monkeypatch):
+    snake_id = client.get("/api/snakes", params={"limit": 1}).json()["items"][0]["id"]
+    fail_reads(monkeypatch)
+    # Let the next test reload right away
+    monkeypatch.setattr(server.catalog_cache, "retry_after", 0)
+    failures = server.catalog_cache.load_failures
+    server.catalog_cache.invalidate()
+    serves_stale_catalog(client, snake_id)
+    assert server.catalog_cache.load_failures > failures
+
+
+def test_restores_the_last_known_good_catalog_at_startup(client, monkeypatch):
+    snake_id = client.get("/api/snakes", params={"limit": 1}).json()["items"][0]["id"]
+    # A worker starting while the backend is down, with the catalog an earlier worker saved
+    fail_reads(monkeypatch)
+    monkeypatch.setattr(server, "catalog_cache", CatalogCache(retry_after=0))
+    monkeypatch.setattr(server, "emergency_response", None)
+    server.restore_last_known_good()
+    serves_stale_catalog(client, snake_id)
+
+
+def test_rejects_writes(client):
+    assert client.post("/api/init-data").status_code == 503
+
+
+def test_is_ready_without_a_database(client):
+    assert client.get("/readyz").json() == {"status": "ready"}
@@ -0,0 +1,88 @@
+"""The catalog file shared by the workers on a host.
+
+    python -m pytest tests
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from catalog_cache import CatalogCache, CatalogSnapshot, content_tag, encode_json  # noqa: E402
+from models import SNAKE_CARD_FIELDS, Snake, stable_id  # noqa: E402
+from seed_data import emergency_info, sample_snakes  # noqa: E402
+from shared_catalog import SharedCatalog, map_snapshot, write_snapshot  # noqa: E402
+
+INDEX_FIELDS = (*SNAKE_CARD_FIELDS, "countries")
+CATALOG = {
+    "snakes": [Snake(id=stable_id("snake", item["scientific_name"]), **item).model_dump(mode="json") for item in sample_snakes],
+    "emergency_info": emergency_info,
+}
+
+
+@pytest.fixture
+def mapped(tmp_path):
+    write_snapshot(tmp_path / "catalog.bin", CATALOG, INDEX_FIELDS, SNAKE_CARD_FIELDS)
+    return map_snapshot(tmp_path / "catalog.bin")
+
+
+def test_workers_parse_only_the_index(mapped):
+    snake = CATALOG["snakes"][0]
+    assert mapped["snakes"][0] == {field: snake[field] for field in INDEX_FIELDS}
+    assert mapped["emergency_info"] == emergency_info
+    # Tags describe the full documents, so they agree with unshared workers
+    assert mapped["snake_tags"][snake["id"]] == content_tag(snake)
+
+
+def test_documents_and_cards_are_sliced_from_the_file(mapped):
+    for snake in CATALOG["snakes"]:
+        assert mapped["bodies"].get(snake["id"]) == encode_json(snake)
+        assert json.loads(mapped["cards"].get(snake["id"])) == {field: snake[field] for field in SNAKE_CARD_FIELDS}
+    assert mapped["bodies"].get("not-a-snake") is None
+
+
+def test_patching_drops_only_the_changed_bodies(mapped):
+    cache = CatalogCache()
+
+    async def load():
+        return mapped
+
+    asyncio.run(cache.snapshot(load))
+    changed = {**CATALOG["snakes"][0], "name": "Renamed"}
+    removed = CATALOG["snakes"][1]["id"]
+    patched = cache.patch([changed], [removed])
+    assert changed["id"] not in patched.bodies and removed not in patched.bodies
+    assert CATALOG["snakes"][2]["id"] in patched.cards
+    assert patched.by_id[changed["id"]] == changed
+    assert patched.snake_tags[changed["id"]] == content_tag(changed)
+
+
+def test_rebuilds_only_for_a_new_source(tmp_path):
+    builds = []
+
+    async def build():
+        builds.append(1)
+        return CATALOG
+
+    async def main():
+        first = SharedCatalog(tmp_path, index_fields=INDEX_FIELDS, card_fields=SNAKE_CARD_FIELDS)
+        await first.load(build, 1)
+        # Another worker on the host maps what the first one built
+        second = SharedCatalog(tmp_path, index_fields=INDEX_FIELDS, card_fields=SNAKE_CARD_FIELDS)
+        catalog = await second.load(build, 1)
+        assert len(builds) == 1
+        assert len(catalog["snakes"]) == len(sample_snakes)
+        await second.load(build, 2)
+        assert len(builds) == 2
+
+    asyncio.run(main())
+
+
+def test_catalog_snapshot_accepts_a_mapped_catalog(mapped):
+    snapshot = CatalogSnapshot(1, **mapped)
+    unshared = CatalogSnapshot(1, CATALOG["snakes"], emergency_info)
+    assert snapshot.tag == unshared.tag
+    assert snapshot.by_country.keys() == unshared.by_country.keys()
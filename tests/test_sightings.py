@@ -0,0 +1,52 @@
+"""Spilling and recovering sighting reports across worker restarts.
+
+    python -m pytest tests
+"""
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from sightings import claim_spills, load_spill, spill  # noqa: E402
+
+
+def report(species_id):
+    return {
+        "meta": {"species_id": species_id, "country": "India"},
+        "observed_at": datetime(2026, 5, 1, 12, 0),
+        "received_at": datetime(2026, 5, 1, 12, 1),
+    }
+
+
+def test_each_spill_gets_its_own_file(tmp_path):
+    path = tmp_path / "sightings_spill.ndjson"
+    first = spill(path, [report("a")])
+    second = spill(path, [report("b"), report("c")])
+    assert first != second
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([first.name, second.name])
+
+
+def test_spills_are_claimed_once(tmp_path):
+    path = tmp_path / "sightings_spill.ndjson"
+    spill(path, [report("a")])
+    spill(path, [report("b"), report("c")])
+    claimed = claim_spills(path)
+    # A worker starting alongside finds nothing left to claim
+    assert claim_spills(path) == []
+    reports = [r for claim in claimed for r in load_spill(claim)]
+    assert sorted(r["meta"]["species_id"] for r in reports) == ["a", "b", "c"]
+    assert reports[0]["observed_at"] == datetime(2026, 5, 1, 12, 0)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_claims_a_spill_from_a_single_shared_file(tmp_path):
+    path = tmp_path / "sightings_spill.ndjson"
+    path.write_text('{"meta": {"species_id": "a"}, "observed_at": "2026-05-01T12:00:00"}\n', encoding="utf-8")
+    [claimed] = claim_spills(path)
+    assert not path.exists()
+    assert load_spill(claimed)[0]["observed_at"] == datetime(2026, 5, 1, 12, 0)
+
+
+def test_missing_spill_is_empty(tmp_path):
+    assert load_spill(tmp_path / "gone.ndjson") == []
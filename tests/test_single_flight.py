@@ -0,0 +1,104 @@
+"""Coalescing of concurrent identical queries.
+
+    python -m pytest tests
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from single_flight import FlightTimeout, SingleFlight  # noqa: E402
+
+
+class Query:
+    """Stands in for a database query; counts how often it actually runs"""
+
+    def __init__(self, result="rows", error=None, delay=0.05):
+        self.result = result
+        self.error = error
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_identical_queries_run_once():
+    async def main():
+        flight, query = SingleFlight("test"), Query()
+        results = await asyncio.gather(*(flight.do("snakes", query) for _ in range(20)))
+        return flight, query, results
+
+    flight, query, results = asyncio.run(main())
+    assert query.calls == 1
+    assert results == ["rows"] * 20
+    assert len(flight) == 0
+
+
+def test_different_keys_run_separately():
+    async def main():
+        flight, query = SingleFlight("test"), Query()
+        await asyncio.gather(flight.do("africa", query), flight.do("asia", query), flight.do("africa", query))
+        return query
+
+    assert asyncio.run(main()).calls == 2
+
+
+def test_runs_again_once_the_call_finished():
+    async def main():
+        flight, query = SingleFlight("test"), Query(delay=0)
+        await flight.do("snakes", query)
+        await flight.do("snakes", query)
+        return query
+
+    assert asyncio.run(main()).calls == 2
+
+
+def test_error_is_raised_in_every_waiter():
+    async def main():
+        flight, query = SingleFlight("test"), Query(error=RuntimeError("down"))
+        results = await asyncio.gather(*(flight.do("snakes", query) for _ in range(5)), return_exceptions=True)
+        return query, results
+
+    query, results = asyncio.run(main())
+    assert query.calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_timeout_bounds_the_call():
+    async def main():
+        flight = SingleFlight("test", timeout=0.01)
+        await flight.do("snakes", Query(delay=1))
+
+    with pytest.raises(FlightTimeout):
+        asyncio.run(main())
+
+
+def test_timeouts_inside_the_call_are_its_own_errors():
+    async def main():
+        flight = SingleFlight("test", timeout=1)
+        await flight.do("snakes", Query(error=asyncio.TimeoutError()))
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(main())
+
+
+def test_cancelled_waiter_leaves_the_call_running():
+    async def main():
+        flight, query = SingleFlight("test"), Query()
+        first = asyncio.ensure_future(flight.do("snakes", query))
+        second = asyncio.ensure_future(flight.do("snakes", query))
+        await asyncio.sleep(0)
+        first.cancel()
+        return query, await second
+
+    query, result = asyncio.run(main())
+    assert query.calls == 1
+    assert result == "rows"